@@ -0,0 +1,204 @@
+"""Cache module for reusing parsed files within and between CLI runs."""
+
+import hashlib
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from . import __version__
+
+if TYPE_CHECKING:
+    from .parser import ParsedFile
+
+# Environment variable overriding the cache directory (empty disables caching)
+CACHE_DIR_ENV = 'QUIVER_CACHE_DIR'
+
+# Files smaller than this parse faster than the cache can be read and written
+MIN_SIZE = 64 * 1024
+
+# Bump when the layout of pickled ParsedFile objects changes
+CACHE_FORMAT = 2
+
+# Number of recently parsed files kept in memory for repeat parses in one process
+MEMORY_MAX_ENTRIES = 8
+
+# Number of cache files kept on disk; the least recently written are removed
+DISK_MAX_ENTRIES = 32
+
+# Absolute path -> (cache key, cache file bytes), least recently used first.
+# Entries are kept pickled so every hit hands out an independent copy
+_memory: 'OrderedDict[str, Tuple[tuple, bytes]]' = OrderedDict()
+
+
+def get_cache_dir() -> Optional[Path]:
+    """
+    Get the directory where parsed files are cached.
+
+    Returns:
+        Cache directory, or None if caching is disabled
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override is not None:
+        return Path(override) if override else None
+
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'quiver'
+
+
+def _cache_key(st: os.stat_result) -> tuple:
+    """
+    Build the validity key for a cached parse from the source file's stat.
+
+    quiver saves by replacing the file, which gives it a new inode, so the
+    key changes on every save even if size and mtime happen to match.
+    """
+    return (
+        CACHE_FORMAT,
+        __version__,
+        st.st_dev,
+        st.st_ino,
+        st.st_size,
+        st.st_mtime_ns,
+        st.st_ctime_ns,
+    )
+
+
+def _cache_path(cache_dir: Path, filepath: str) -> Path:
+    """Get the cache file for an absolute source path."""
+    digest = hashlib.sha1(filepath.encode('utf-8')).hexdigest()
+    return cache_dir / f'{digest}.pickle'
+
+
+def load(filepath: str, st: os.stat_result) -> Optional['ParsedFile']:
+    """
+    Load a cached parse of a file if it is still valid.
+
+    Args:
+        filepath: Absolute path of the source markdown file
+        st: Current stat of the source file
+
+    Returns:
+        The cached ParsedFile, or None on a miss
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None or st.st_size < MIN_SIZE:
+        return None
+
+    key = _cache_key(st)
+    remembered = _memory.get(filepath)
+    if remembered is not None and remembered[0] == key:
+        # Already loaded or parsed earlier in this process
+        _memory.move_to_end(filepath)
+        return pickle.loads(remembered[1])[1]
+
+    try:
+        with open(_cache_path(cache_dir, filepath), 'rb') as f:
+            data = f.read()
+        cached_key, parsed = pickle.loads(data)
+    except Exception:
+        # Missing, corrupt or written by an incompatible version
+        return None
+
+    if cached_key != key:
+        return None
+
+    _remember(filepath, key, data)
+    return parsed
+
+
+def store(filepath: str, st: os.stat_result, parsed: 'ParsedFile') -> None:
+    """
+    Cache a parsed file. Failures are ignored since caching is best-effort.
+
+    Args:
+        filepath: Absolute path of the source markdown file
+        st: Stat of the source file taken before it was read
+        parsed: ParsedFile produced from the file
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None or st.st_size < MIN_SIZE:
+        return
+
+    key = _cache_key(st)
+    try:
+        data = pickle.dumps((key, parsed), protocol=pickle.HIGHEST_PROTOCOL)
+    except pickle.PicklingError:
+        return
+    _remember(filepath, key, data)
+
+    cache_path = _cache_path(cache_dir, filepath)
+    tmp_path = cache_path.with_name(f'{cache_path.name}.tmp.{os.getpid()}')
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return
+
+    _prune(cache_dir)
+
+
+def refresh(filepath: str, parsed: 'ParsedFile') -> None:
+    """
+    Re-cache a file that quiver just wrote, from the object it saved.
+
+    Saving replaces the file, so its stat key changes and the previous entry
+    can never match again. Storing the saved object under the new key lets
+    the next command skip parsing the file quiver itself wrote.
+
+    Args:
+        filepath: Absolute path of the source markdown file
+        parsed: ParsedFile describing the content that was written
+    """
+    invalidate(filepath)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return
+    store(filepath, st, parsed)
+
+
+def invalidate(filepath: str) -> None:
+    """
+    Forget the in-memory parse of a file, e.g. after quiver rewrote it.
+
+    The on-disk entry needs no explicit invalidation since its key no longer
+    matches the rewritten file.
+
+    Args:
+        filepath: Absolute path of the source markdown file
+    """
+    _memory.pop(filepath, None)
+
+
+def _remember(filepath: str, key: tuple, data: bytes) -> None:
+    """Keep a pickled parse in memory, evicting the least recently used."""
+    _memory[filepath] = (key, data)
+    _memory.move_to_end(filepath)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def _prune(cache_dir: Path) -> None:
+    """Remove the oldest cache files once there are more than DISK_MAX_ENTRIES."""
+    try:
+        cache_files = list(cache_dir.glob('*.pickle'))
+        if len(cache_files) <= DISK_MAX_ENTRIES:
+            return
+        ages = sorted((path.stat().st_mtime_ns, path) for path in cache_files)
+    except OSError:
+        return
+
+    for _, path in ages[:len(ages) - DISK_MAX_ENTRIES]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
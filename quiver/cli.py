@@ -7,14 +7,16 @@ from typing import Optional
 
 from . import __version__
 from .parser import parse_file
-from .selector import select_random_available
-from .state import pick_and_mark, save_state, validate_history, find_entry_by_index
+from .selector import count_available, select_random_available_many
+from .state import pick_mark_save, validate_history, find_entry_by_index
 from .rollback import rollback_last, reset_all
 
 
 def cmd_pick(args) -> int:
     """
-    Pick a random unused entry.
+    Pick one or more random unused entries.
+
+    All picks from a single invocation share one parse and one save.
 
     Args:
         args: Parsed command-line arguments
@@ -23,41 +25,49 @@ def cmd_pick(args) -> int:
         Exit code (0 for success, 1 for error)
     """
     try:
-        # Parse the file
-        parsed = parse_file(args.file)
+        # Parse the file, which is about to be rewritten unless this is a dry run
+        parsed = parse_file(args.file, cache_result=args.dry_run)
 
         # Validate history
         validate_history(parsed)
 
-        # Get history
-        history = parsed.metadata.get('history', [])
+        # Get used indices as a set for O(1) membership checks
+        used = parsed.used_indices()
 
-        # Select a random available entry
-        entry = select_random_available(parsed.entries, history)
+        # Select distinct random available entries
+        entries = select_random_available_many(parsed.entries, used, args.count)
 
-        if entry is None:
+        if not entries:
             print("❌ No unused entries available.")
             print("   Use 'quiver reset' to start over.")
             return 1
 
-        # Mark as used and save (unless dry-run)
+        # Mark as used and save once (unless dry-run)
         if not args.dry_run:
-            pick_and_mark(parsed, entry)
-            save_state(parsed)
+            pick_mark_save(parsed, entries, args.durable)
+
+        for i, entry in enumerate(entries):
+            if i:
+                print()
 
-        # Display the selected entry
-        print(f"🎯 {entry.content}")
+            # Display the selected entry
+            print(f"🎯 {entry.content}")
 
-        # Display metadata if present
-        if entry.metadata:
-            for key, value in entry.metadata.items():
-                print(f"   {key}: {value}")
+            # Display metadata if present
+            if entry.metadata:
+                for key, value in entry.metadata.items():
+                    print(f"   {key}: {value}")
+
+        if len(entries) < args.count:
+            print(f"\n   Only {len(entries)} unused entries were available")
 
         if args.dry_run:
             print("\n   (Dry run - no changes made)")
 
         if args.verbose:
-            available_count = len([e for e in parsed.entries if not e.is_used(history)])
+            if not args.dry_run:
+                used = used | {entry.row_index for entry in entries}
+            available_count = count_available(parsed.entries, used)
             total_count = len(parsed.entries)
             print(f"\n   Remaining: {available_count}/{total_count}")
 
@@ -87,35 +97,21 @@ def cmd_rollback(args) -> int:
         Exit code (0 for success, 1 for error)
     """
     try:
-        if args.dry_run:
-            # Just show what would be rolled back
-            parsed = parse_file(args.file)
-            if not parsed.metadata.get('history'):
-                print("ℹ️  No entries to rollback")
-                return 0
-
-            last_index = parsed.metadata['history'][-1]
-            last_entry = find_entry_by_index(parsed, last_index)
-            if last_entry:
-                print(f"↩️  Would rollback: \"{last_entry.content}\"")
-            else:
-                print(f"↩️  Would rollback: index {last_index}")
-            print("\n   (Dry run - no changes made)")
-            return 0
-
-        # Perform rollback
-        entry = rollback_last(args.file)
+        entry, parsed = rollback_last(args.file, args.durable, args.dry_run)
 
         if entry is None:
             print("ℹ️  No entries to rollback")
             return 0
 
+        if args.dry_run:
+            print(f"↩️  Would rollback: \"{entry.content}\"")
+            print("\n   (Dry run - no changes made)")
+            return 0
+
         print(f"↩️  Rolled back: \"{entry.content}\"")
 
         if args.verbose:
-            parsed = parse_file(args.file)
-            history = parsed.metadata.get('history', [])
-            used_count = len(set(history))
+            used_count = len(parsed.used_indices())
             total_count = len(parsed.entries)
             print(f"   Status: {used_count}/{total_count} used")
 
@@ -145,20 +141,13 @@ def cmd_reset(args) -> int:
         Exit code (0 for success, 1 for error)
     """
     try:
-        if args.dry_run:
-            # Just show what would be reset
-            parsed = parse_file(args.file)
-            history = parsed.metadata.get('history', [])
-            used_count = len(set(history))
-            total_count = len(parsed.entries)
+        count, parsed = reset_all(args.file, args.durable, args.dry_run)
 
-            print(f"🔄 Would reset {used_count} of {total_count} entries")
+        if args.dry_run:
+            print(f"🔄 Would reset {count} of {len(parsed.entries)} entries")
             print("\n   (Dry run - no changes made)")
             return 0
 
-        # Perform reset
-        count = reset_all(args.file)
-
         if count == 0:
             print("ℹ️  All entries are already unused")
         else:
@@ -189,9 +178,10 @@ def cmd_status(args) -> int:
     try:
         parsed = parse_file(args.file)
         history = parsed.metadata.get('history', [])
+        used = parsed.used_indices()
 
-        used_count = len(set(history))
-        available_count = len([e for e in parsed.entries if not e.is_used(history)])
+        used_count = len(used)
+        available_count = count_available(parsed.entries, used)
         total_count = len(parsed.entries)
 
         print(f"📊 Status: {used_count}/{total_count} entries used ({available_count} remaining)")
@@ -227,6 +217,28 @@ def cmd_status(args) -> int:
         return 1
 
 
+def _positive_int(value: str) -> int:
+    """
+    Argparse type for options that require a positive integer.
+
+    Args:
+        value: Raw command-line value
+
+    Returns:
+        The parsed integer
+
+    Raises:
+        argparse.ArgumentTypeError: If value is not an integer >= 1
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def main(argv: Optional[list] = None) -> int:
     """
     Main entry point for the CLI.
@@ -262,6 +274,12 @@ def main(argv: Optional[list] = None) -> int:
         help='Preview action without making changes'
     )
 
+    parser.add_argument(
+        '--durable',
+        action='store_true',
+        help='Flush changes to disk (fsync) before replacing the file'
+    )
+
     # Subcommands
     subparsers = parser.add_subparsers(
         dest='command',
@@ -278,6 +296,12 @@ def main(argv: Optional[list] = None) -> int:
         'file',
         help='Path to markdown file'
     )
+    pick_parser.add_argument(
+        '--count', '-n',
+        type=_positive_int,
+        default=1,
+        help='Number of distinct entries to pick (default: 1)'
+    )
     pick_parser.set_defaults(func=cmd_pick)
 
     # Rollback command
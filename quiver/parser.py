@@ -1,20 +1,34 @@
 """Parser module for reading and writing markdown table files."""
 
+import os
 import re
+import stat
+import sys
 from dataclasses import dataclass, field
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Container, FrozenSet, List, Optional, Sequence, Tuple
+
+from . import cache
 
 
 @dataclass
 class Entry:
     """Represents a single entry from the markdown table."""
+    __slots__ = ('content', 'metadata', 'row_index')
+
     content: str
     metadata: dict[str, str]
     row_index: int
 
-    def is_used(self, history: List[int]) -> bool:
-        """Check if this entry is marked as used in history."""
+    def is_used(self, history: Container[int]) -> bool:
+        """
+        Check if this entry is marked as used in history.
+
+        Membership is tested with ``in``, so callers checking many entries
+        should pass a set (e.g. ``ParsedFile.used_indices()``) rather than the raw
+        history list.
+        """
         return self.row_index in history
 
 
@@ -26,26 +40,52 @@ class ParsedFile:
     metadata: dict = field(default_factory=dict)
     raw_content: str = ""
     filepath: str = ""
+    table_offset: Optional[int] = None
+    metadata_span: Optional[Tuple[int, int]] = None
+
+    def used_indices(self) -> FrozenSet[int]:
+        """
+        Get the set of row indices that have been used.
+
+        Duplicates in history collapse to a single index, so ``len()`` of the
+        result is the number of used entries. The set is built from the
+        current history on each call, so compute it once and reuse it rather
+        than calling this per entry.
+        """
+        return frozenset(self.metadata.get('history', ()))
 
 
 class MarkdownTableParser:
     """Parser for markdown tables with state tracking."""
 
-    # Regex patterns
-    TABLE_ROW_PATTERN = re.compile(r'^\|(.+)\|$')
-    TABLE_SEPARATOR_PATTERN = re.compile(r'^\|[\s\-:|]+\|$')
+    # Characters a separator row (e.g. |---|:---:|) is made of
+    TABLE_SEPARATOR_CHARS = ' \t-:|'
+
+    # Metadata values shorter than this are interned, since short values
+    # (categories, tags, prices) tend to repeat across rows
+    INTERN_MAX_LENGTH = 32
+
+    # Read size for files whose size fstat can't report (pipes, /proc)
+    READ_CHUNK_SIZE = 65536
+
+    # Regex patterns, compiled once at import. The metadata block is only
+    # ever written with ASCII whitespace, so ``\s`` doesn't need Unicode rules
+    TABLE_LINE_PATTERN = re.compile(r'(?m)^[ \t]*\|(?P<body>[^\n]+)\|[ \t\r]*$')
     METADATA_PATTERN = re.compile(
         r'<!--\s*QUIVER_METADATA\s*\n(.*?)\n-->',
-        re.DOTALL
+        re.DOTALL | re.ASCII
     )
 
     @staticmethod
-    def parse_file(filepath: str) -> ParsedFile:
+    def parse_file(filepath: str, cache_result: bool = True) -> ParsedFile:
         """
         Parse a markdown file containing a table.
 
         Args:
             filepath: Path to the markdown file
+            cache_result: Store the parse in the cache. Pass False when the
+                file is about to be rewritten, since the entry would never
+                match again
 
         Returns:
             ParsedFile object with entries and metadata
@@ -54,14 +94,57 @@ class MarkdownTableParser:
             FileNotFoundError: If the file doesn't exist
         """
         path = Path(filepath)
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {filepath}")
+        absolute_path = str(path.absolute())
+        try:
+            st = os.stat(path)
+
+            # Reuse the previous parse if the file hasn't changed since
+            cached = cache.load(absolute_path, st)
+            if cached is not None:
+                return cached
+
+            content = MarkdownTableParser._read_content(path)
+        except FileNotFoundError as e:
+            raise FileNotFoundError(f"File not found: {filepath}") from e
 
-        content = path.read_text(encoding='utf-8')
+        parsed = MarkdownTableParser._parse_content(content, absolute_path)
+        if cache_result:
+            cache.store(absolute_path, st, parsed)
+
+        return parsed
+
+    @staticmethod
+    def parse_string(content: str, filepath: str = "") -> ParsedFile:
+        """
+        Parse markdown content that is already in memory.
 
+        Args:
+            content: Markdown text containing a table
+            filepath: Path to record on the result, used by ``save_file``
+
+        Returns:
+            ParsedFile object with entries and metadata
+        """
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return MarkdownTableParser._parse_content(content, filepath)
+
+    @staticmethod
+    def _parse_content(content: str, filepath: str) -> ParsedFile:
+        """
+        Build a ParsedFile from content with newlines already normalized.
+
+        Args:
+            content: Markdown text using ``\\n`` line endings
+            filepath: Path to record on the result
+
+        Returns:
+            ParsedFile object with entries and metadata
+        """
         # Extract table and metadata
         table_data = MarkdownTableParser._extract_table(content)
-        quiver_metadata = MarkdownTableParser._extract_metadata(content)
+        metadata_match = MarkdownTableParser.METADATA_PATTERN.search(content)
+        quiver_metadata = MarkdownTableParser._extract_metadata(metadata_match)
 
         # Parse entries from table
         entries = MarkdownTableParser._extract_entries_from_table(
@@ -74,60 +157,181 @@ class MarkdownTableParser:
             headers=table_data['headers'],
             metadata=quiver_metadata,
             raw_content=content,
-            filepath=str(path.absolute())
+            filepath=filepath,
+            table_offset=table_data['start'],
+            metadata_span=metadata_match.span() if metadata_match else None
         )
 
+    @staticmethod
+    def _read_content(path: Path) -> str:
+        """
+        Read a file's text with a single sized read.
+
+        Equivalent to ``path.read_text(encoding='utf-8')`` (including
+        universal newline translation), but sizes the read from one
+        ``fstat`` instead of going through the buffered text IO stack.
+
+        Args:
+            path: Path to read
+
+        Returns:
+            Decoded file content with newlines normalized to ``\\n``
+        """
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            st = os.fstat(fd)
+            size = st.st_size
+            # Pipes and FIFOs (e.g. ``<(cat list.md)``) can't be advised
+            if hasattr(os, 'posix_fadvise') and stat.S_ISREG(st.st_mode):
+                os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+
+            # Normally a single read returns the whole file. Pipes and /proc
+            # files report a size of 0, so read those in real chunks
+            read_size = size if size > 0 else MarkdownTableParser.READ_CHUNK_SIZE
+
+            chunks = []
+            while True:
+                chunk = os.read(fd, read_size)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        finally:
+            os.close(fd)
+
+        content = b''.join(chunks).decode('utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+
+    @staticmethod
+    def _write_content(path: Path, content: str, durable: bool = False) -> None:
+        """
+        Atomically replace a file's contents.
+
+        The text is written in one go to a temporary file next to the target,
+        which is then renamed over it with ``os.replace``, so readers never
+        see a half-written file. Symlinks are followed and the original
+        file's permissions are kept.
+
+        Args:
+            path: Path to write
+            content: Text to encode as UTF-8 and write
+            durable: Also fsync the data before the rename and the
+                directory after it, so the new contents survive a power
+                loss or OS crash
+        """
+        target = os.path.realpath(path)
+        tmp_path = f"{target}.tmp.{os.getpid()}"
+
+        try:
+            mode = stat.S_IMODE(os.stat(target).st_mode)
+        except FileNotFoundError:
+            mode = None
+
+        data = memoryview(content.encode('utf-8'))
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            try:
+                while data:
+                    written = os.write(fd, data)
+                    data = data[written:]
+                if durable:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            if mode is not None:
+                os.chmod(tmp_path, mode)
+            os.replace(tmp_path, target)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if durable:
+            # The rename itself is only on disk once the directory is synced
+            dir_fd = os.open(os.path.dirname(target), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
     @staticmethod
     def _extract_table(content: str) -> dict:
         """
         Extract table headers and rows from markdown content.
 
+        The whole document is scanned in a single pass of
+        ``TABLE_LINE_PATTERN``, so non-table lines are skipped by the regex
+        engine instead of being visited one by one.
+
         Args:
             content: Raw markdown content
 
         Returns:
-            Dictionary with 'headers' and 'rows' keys
+            Dictionary with 'headers' and 'rows' keys, plus 'start' holding
+            the offset of the header row in content (None if no table)
         """
-        lines = content.split('\n')
         headers = []
         rows = []
         in_table = False
         row_index = 0
+        prev_end = 0
+        start = None
 
-        for line in lines:
-            line = line.strip()
+        for match in MarkdownTableParser.TABLE_LINE_PATTERN.finditer(content):
+            # Once inside the table, any non-blank, non-heading line between
+            # two table rows ends the table
+            if in_table and MarkdownTableParser._ends_table(content[prev_end:match.start()]):
+                break
+            prev_end = match.end()
 
-            # Check if this is a table row
-            if MarkdownTableParser.TABLE_ROW_PATTERN.match(line):
-                cells = [cell.strip() for cell in line.strip('|').split('|')]
-
-                if not in_table:
-                    # This is the header row
-                    headers = cells
-                    in_table = True
-                elif MarkdownTableParser.TABLE_SEPARATOR_PATTERN.match(line):
-                    # This is the separator row, skip it
-                    continue
-                else:
-                    # This is a data row
-                    rows.append({
-                        'cells': cells,
-                        'row_index': row_index
-                    })
-                    row_index += 1
-            elif in_table and line and not line.startswith('#'):
-                # Check for separator line (---|---|---)
-                if MarkdownTableParser.TABLE_SEPARATOR_PATTERN.match(line):
-                    continue
-                # If we were in a table and hit a non-table line, we're done
-                elif not MarkdownTableParser.TABLE_ROW_PATTERN.match(line):
-                    break
+            body = match.group('body')
+
+            if not in_table:
+                # This is the header row
+                headers = list(map(str.strip, body.split('|')))
+                in_table = True
+                start = match.start()
+            elif not body.strip(MarkdownTableParser.TABLE_SEPARATOR_CHARS):
+                # This is the separator row, skip it
+                continue
+            else:
+                # This is a data row
+                rows.append({
+                    'cells': list(map(str.strip, body.split('|'))),
+                    'row_index': row_index
+                })
+                row_index += 1
 
         return {
             'headers': headers,
-            'rows': rows
+            'rows': rows,
+            'start': start
         }
 
+    @staticmethod
+    def _ends_table(gap: str) -> bool:
+        """
+        Check whether the text between two table rows terminates the table.
+
+        Args:
+            gap: Raw content between the end of one table row and the next
+
+        Returns:
+            True if the gap contains a line that is neither blank nor a heading
+        """
+        if not gap.strip():
+            return False
+
+        for line in gap.split('\n'):
+            line = line.strip()
+            if line and not line.startswith('#'):
+                return True
+        return False
+
     @staticmethod
     def _extract_entries_from_table(headers: List[str], rows: List[dict]) -> List[Entry]:
         """
@@ -146,6 +350,10 @@ class MarkdownTableParser:
         # Check if last column is "Used" (for backwards compatibility, we'll ignore it)
         has_used_column = headers[-1].lower() == 'used'
 
+        # Every row shares the same interned header strings for its metadata keys
+        metadata_headers = [sys.intern(header) for header in headers[1:]]
+        intern_max = MarkdownTableParser.INTERN_MAX_LENGTH
+
         entries = []
 
         for row_data in rows:
@@ -156,48 +364,42 @@ class MarkdownTableParser:
             if len(cells) < 1:
                 continue
 
-            # First column is the entry content
-            content = cells[0]
-
             # Determine metadata column range
             # If there's a "Used" column, skip it; otherwise use all remaining columns
             metadata_end = len(cells) - 1 if has_used_column else len(cells)
 
-            # Middle columns are metadata
-            metadata = {}
-            for i in range(1, metadata_end):
-                if i < len(headers):
-                    header = headers[i]
-                    value = cells[i]
-                    metadata[header] = value
-
+            # First column is the entry content, middle columns are metadata
+            # (zip stops at the shorter side, dropping cells without a header)
+            values = [
+                sys.intern(value) if len(value) < intern_max else value
+                for value in cells[1:metadata_end]
+            ]
             entries.append(Entry(
-                content=content,
-                metadata=metadata,
+                content=cells[0],
+                metadata=dict(zip(metadata_headers, values)),
                 row_index=row_index
             ))
 
         return entries
 
     @staticmethod
-    def _extract_metadata(content: str) -> dict:
+    def _extract_metadata(match: Optional['re.Match']) -> dict:
         """
         Extract QUIVER_METADATA from HTML comment in the file.
 
         Args:
-            content: Raw markdown content
+            match: METADATA_PATTERN match in the raw content, or None
 
         Returns:
             Dictionary with metadata (history as list of indices, etc.)
         """
-        match = MarkdownTableParser.METADATA_PATTERN.search(content)
         if not match:
             return {'history': []}
 
         metadata_str = match.group(1).strip()
 
         # Parse simple key: value format
-        metadata = {'history': []}
+        metadata: dict = {'history': []}
 
         for line in metadata_str.split('\n'):
             line = line.strip()
@@ -213,16 +415,24 @@ class MarkdownTableParser:
                     if value:
                         # Split by comma and convert to integers
                         try:
-                            items = [
-                                int(item.strip().strip('"').strip("'"))
-                                for item in value.split(',')
-                                if item.strip()
-                            ]
-                            metadata['history'] = items
+                            # Fast path: plain integers. int() ignores surrounding
+                            # whitespace, so map() converts every item in C.
+                            # History stays a plain list since callers compare
+                            # and extend it like one
+                            metadata['history'] = list(map(int, value.split(',')))
                         except ValueError:
-                            # If parsing fails (e.g., old string format), reset to empty
-                            # This provides backwards compatibility
-                            metadata['history'] = []
+                            try:
+                                # Quoted items or empty slots (e.g. a trailing comma)
+                                items = [
+                                    int(item.strip().strip('"').strip("'"))
+                                    for item in value.split(',')
+                                    if item.strip()
+                                ]
+                                metadata['history'] = items
+                            except ValueError:
+                                # If parsing fails (e.g., old string format), reset to empty
+                                # This provides backwards compatibility
+                                metadata['history'] = []
                     else:
                         metadata['history'] = []
                 else:
@@ -241,87 +451,222 @@ class MarkdownTableParser:
         Returns:
             Markdown-formatted string
         """
-        lines = []
-
-        # Extract any content before the table (headers, etc.)
-        original_lines = parsed_file.raw_content.split('\n')
-        pre_table_lines = []
-        in_table = False
-
-        for line in original_lines:
-            if MarkdownTableParser.TABLE_ROW_PATTERN.match(line.strip()):
-                in_table = True
-                break
-            elif not line.strip().startswith('<!--'):
-                pre_table_lines.append(line)
-
-        # Add pre-table content
-        if pre_table_lines:
-            lines.extend(pre_table_lines)
-            if not lines[-1].strip():
-                pass  # Already has blank line
-            else:
-                lines.append('')
+        lines = MarkdownTableParser._serialized_pre_table(parsed_file)
 
         # Filter out "Used" column from headers if present
         headers = [h for h in parsed_file.headers if h.lower() != 'used']
 
         # Build table header
-        header_row = '| ' + ' | '.join(headers) + ' |'
-        lines.append(header_row)
+        lines.append(f"| {' | '.join(headers)} |")
 
         # Build separator row
-        separator = '|' + '|'.join(['---' for _ in headers]) + '|'
-        lines.append(separator)
+        lines.append('|' + '|'.join(['---'] * len(headers)) + '|')
+
+        # Build data rows, adding metadata columns in header order (excluding "Used")
+        metadata_headers = headers[1:]  # Skip first (Entry)
+        if metadata_headers:
+            get_values = MarkdownTableParser._metadata_getter(metadata_headers)
+            for entry in parsed_file.entries:
+                try:
+                    values = get_values(entry.metadata)
+                except KeyError:
+                    # Rows shorter than the header have no value for the last columns
+                    values = [entry.metadata.get(header, '') for header in metadata_headers]
+
+                lines.append(f"| {entry.content} | {' | '.join(values)} |")
+        else:
+            lines.extend(f"| {entry.content} |" for entry in parsed_file.entries)
 
-        # Build data rows
-        for entry in parsed_file.entries:
-            cells = [entry.content]
+        # Add metadata comment at the end
+        if parsed_file.metadata:
+            lines.append('')
+            lines.extend(MarkdownTableParser._format_metadata(parsed_file.metadata))
 
-            # Add metadata columns in header order (excluding "Used")
-            for header in headers[1:]:  # Skip first (Entry)
-                cells.append(entry.metadata.get(header, ''))
+        return '\n'.join(lines)
 
-            row = '| ' + ' | '.join(cells) + ' |'
-            lines.append(row)
+    @staticmethod
+    def _serialized_pre_table(parsed_file: ParsedFile) -> List[str]:
+        """
+        Build the lines ``serialize_file`` writes before the table.
 
-        # Add metadata comment at the end
-        if parsed_file.metadata:
+        Args:
+            parsed_file: ParsedFile whose raw content to slice
+
+        Returns:
+            Content before the table minus HTML comments, followed by a blank
+            line (empty if there is no such content)
+        """
+        # Extract any content before the table (headers, etc.), slicing it
+        # off directly instead of splitting the whole document into lines
+        pre_table = MarkdownTableParser._pre_table_content(parsed_file)
+        lines = [
+            line for line in pre_table
+            if not line.strip().startswith('<!--')
+        ]
+
+        if lines and lines[-1].strip():
             lines.append('')
-            lines.append('<!-- QUIVER_METADATA')
-
-            # Serialize history as integers
-            if 'history' in parsed_file.metadata:
-                history = parsed_file.metadata['history']
-                if history:
-                    history_str = ', '.join([str(idx) for idx in history])
-                    lines.append(f'history: [{history_str}]')
-                else:
-                    lines.append('history: []')
+        return lines
 
-            lines.append('-->')
+    @staticmethod
+    def _metadata_getter(headers: List[str]) -> Callable[[dict], Sequence[str]]:
+        """
+        Build a function that fetches an entry's metadata values in header order.
 
-        return '\n'.join(lines)
+        The lookup is specialized once per table, so serializing a row is a
+        single C-level ``itemgetter`` call instead of a ``dict.get`` per column.
+
+        Args:
+            headers: Non-empty list of metadata column names
+
+        Returns:
+            Function mapping an entry's metadata dict to its values. It raises
+            KeyError if a column is missing.
+        """
+        getter = itemgetter(*headers)
+        if len(headers) == 1:
+            # itemgetter returns a bare value rather than a tuple for one key
+            return lambda metadata: (getter(metadata),)
+        return getter
 
     @staticmethod
-    def save_file(parsed_file: ParsedFile) -> None:
+    def _format_metadata(metadata: dict) -> List[str]:
+        """
+        Build the lines of the QUIVER_METADATA comment block.
+
+        Args:
+            metadata: ParsedFile metadata to serialize
+
+        Returns:
+            Lines from the opening ``<!--`` to the closing ``-->``
+        """
+        lines = ['<!-- QUIVER_METADATA']
+
+        # Serialize history as integers
+        if 'history' in metadata:
+            history = metadata['history']
+            if history:
+                history_str = ', '.join([str(idx) for idx in history])
+                lines.append(f'history: [{history_str}]')
+            else:
+                lines.append('history: []')
+
+        lines.append('-->')
+        return lines
+
+    @staticmethod
+    def _pre_table_content(parsed_file: ParsedFile) -> List[str]:
+        """
+        Get the lines of raw content that precede the table.
+
+        Uses the table offset recorded at parse time when available, and
+        otherwise searches for the first table row.
+
+        Args:
+            parsed_file: ParsedFile whose raw content to slice
+
+        Returns:
+            Lines before the first table row (all lines if there is no table)
+        """
+        raw_content = parsed_file.raw_content
+        offset = parsed_file.table_offset
+
+        if offset is None:
+            match = MarkdownTableParser.TABLE_LINE_PATTERN.search(raw_content)
+            if match is None:
+                return raw_content.split('\n')
+            offset = match.start()
+
+        # The slice ends with the newline before the table row, so drop the
+        # empty string that split() leaves after it
+        return raw_content[:offset].split('\n')[:-1]
+
+    @staticmethod
+    def save_file(parsed_file: ParsedFile, durable: bool = False) -> None:
         """
         Save a ParsedFile back to disk.
 
         Args:
             parsed_file: ParsedFile object to save
+            durable: fsync the file before replacing the original
         """
+        pre_table = MarkdownTableParser._serialized_pre_table(parsed_file)
         content = MarkdownTableParser.serialize_file(parsed_file)
         path = Path(parsed_file.filepath)
-        path.write_text(content, encoding='utf-8')
+        MarkdownTableParser._write_content(path, content, durable)
+        cache.invalidate(parsed_file.filepath)
+
+        # Describe the text just written, so a later save_metadata on this
+        # object splices into it rather than into the content from before
+        metadata = parsed_file.metadata
+        block_length = len('\n'.join(MarkdownTableParser._format_metadata(metadata)))
+        parsed_file.raw_content = content
+        parsed_file.headers = [h for h in parsed_file.headers if h.lower() != 'used']
+        parsed_file.table_offset = len('\n'.join(pre_table)) + 1 if pre_table else 0
+        parsed_file.metadata_span = (
+            (len(content) - block_length, len(content)) if metadata else None
+        )
+
+    @staticmethod
+    def save_metadata(parsed_file: ParsedFile, durable: bool = False) -> None:
+        """
+        Save only the metadata of a ParsedFile back to disk.
+
+        The QUIVER_METADATA block is spliced into the raw content in place of
+        the one found at parse time, leaving the rest of the file as it was
+        instead of re-serializing every row. Only use this when nothing but
+        the metadata has changed. Files without a metadata block, and legacy
+        files that still have a "Used" column, fall back to ``save_file`` so
+        the table is normalized.
+
+        Args:
+            parsed_file: ParsedFile object to save
+            durable: fsync the file before replacing the original
+        """
+        span = parsed_file.metadata_span
+        headers = parsed_file.headers
+        has_used_column = bool(headers) and headers[-1].lower() == 'used'
+        if span is None or not parsed_file.metadata or has_used_column:
+            MarkdownTableParser.save_file(parsed_file, durable)
+            return
+
+        start, end = span
+        raw_content = parsed_file.raw_content
+        block = '\n'.join(MarkdownTableParser._format_metadata(parsed_file.metadata))
+        content = raw_content[:start] + block + raw_content[end:]
+
+        path = Path(parsed_file.filepath)
+        MarkdownTableParser._write_content(path, content, durable)
+
+        # Keep the recorded offsets valid for a further save of this object.
+        # A block above the table moves the table by its change in length
+        parsed_file.raw_content = content
+        parsed_file.metadata_span = (start, start + len(block))
+        offset = parsed_file.table_offset
+        if offset is not None and start < offset:
+            parsed_file.table_offset = offset + len(block) - (end - start)
+
+        # Only the metadata changed, so the object now matches the file exactly
+        # and can be cached under the new file's key
+        cache.refresh(parsed_file.filepath, parsed_file)
 
 
 # Convenience functions for external use
-def parse_file(filepath: str) -> ParsedFile:
+def parse_file(filepath: str, cache_result: bool = True) -> ParsedFile:
     """Parse a markdown file."""
-    return MarkdownTableParser.parse_file(filepath)
+    return MarkdownTableParser.parse_file(filepath, cache_result)
 
 
-def save_file(parsed_file: ParsedFile) -> None:
+def parse_string(content: str, filepath: str = "") -> ParsedFile:
+    """Parse markdown content from a string."""
+    return MarkdownTableParser.parse_string(content, filepath)
+
+
+def save_file(parsed_file: ParsedFile, durable: bool = False) -> None:
     """Save a parsed file back to disk."""
-    return MarkdownTableParser.save_file(parsed_file)
+    return MarkdownTableParser.save_file(parsed_file, durable)
+
+
+def save_metadata(parsed_file: ParsedFile, durable: bool = False) -> None:
+    """Save only a parsed file's metadata back to disk."""
+    return MarkdownTableParser.save_metadata(parsed_file, durable)
@@ -1,12 +1,22 @@
 """Rollback module for undoing selections."""
 
-from typing import Optional
-
-from .parser import Entry, ParsedFile, parse_file, save_file
+from typing import Optional, Tuple
+
+from .parser import (
+    Entry,
+    MarkdownTableParser,
+    ParsedFile,
+    parse_file,
+    save_metadata,
+)
 from .state import find_entry_by_index, remove_from_history, validate_history
 
 
-def rollback_last(filepath: str) -> Optional[Entry]:
+def rollback_last(
+    filepath: str,
+    durable: bool = False,
+    dry_run: bool = False
+) -> Tuple[Optional[Entry], ParsedFile]:
     """
     Rollback the last selected entry (LIFO).
 
@@ -16,20 +26,23 @@ def rollback_last(filepath: str) -> Optional[Entry]:
     3. Gets the most recent entry index from history
     4. Finds that entry in the entries list
     5. Removes it from history (already done by remove_from_history)
-    6. Saves the file
+    6. Saves the file, rewriting only the metadata block (unless dry_run)
 
     Args:
         filepath: Path to the markdown file
+        durable: fsync the file before replacing the original
+        dry_run: Work out what would be rolled back without writing the file
 
     Returns:
-        The Entry that was rolled back, or None if history is empty
+        Tuple of the Entry that was rolled back (None if history is empty)
+        and the updated ParsedFile, so callers don't need to re-parse
 
     Raises:
         FileNotFoundError: If file doesn't exist
         ValueError: If the entry index in history is not found in the entries list
     """
-    # Parse the file
-    parsed = parse_file(filepath)
+    # Parse the file, which is about to be rewritten unless this is a dry run
+    parsed = parse_file(filepath, cache_result=dry_run)
 
     # Validate history (may clean up invalid indices)
     validate_history(parsed)
@@ -39,8 +52,9 @@ def rollback_last(filepath: str) -> Optional[Entry]:
 
     if last_index is None:
         # Save file in case validate_history cleaned up the history
-        save_file(parsed)
-        return None
+        if not dry_run:
+            save_metadata(parsed, durable)
+        return None, parsed
 
     # Find the entry
     entry = find_entry_by_index(parsed, last_index)
@@ -51,35 +65,80 @@ def rollback_last(filepath: str) -> Optional[Entry]:
             f"Entry index {last_index} found in history but not in entries list"
         )
 
-    # Save the file (entry is already removed from history)
-    save_file(parsed)
+    # Save the file (entry is already removed from history). Only the
+    # history changed, so leave the table as it is on disk
+    if not dry_run:
+        save_metadata(parsed, durable)
 
-    return entry
+    return entry, parsed
 
 
-def reset_all(filepath: str) -> int:
+def reset_all(
+    filepath: str,
+    durable: bool = False,
+    dry_run: bool = False
+) -> Tuple[int, ParsedFile]:
     """
     Reset all entries to unused state by clearing history.
 
+    The file is left untouched when there is no history to clear and it is
+    already in canonical form: a metadata block as quiver would write it
+    (if any) and no legacy Used column. Otherwise it is rewritten, which
+    also drops unparsable history entries and the Used column.
+
     Args:
         filepath: Path to the markdown file
+        durable: fsync the file before replacing the original
+        dry_run: Count what would be reset without writing the file
 
     Returns:
-        Number of entries that were reset
+        Tuple of the number of entries that were reset and the updated
+        ParsedFile
 
     Raises:
         FileNotFoundError: If file doesn't exist
     """
-    # Parse the file
-    parsed = parse_file(filepath)
+    # Parse the file, which is about to be rewritten unless this is a dry run
+    parsed = parse_file(filepath, cache_result=dry_run)
 
-    # Count how many were used (unique indices in history)
-    reset_count = len(set(parsed.metadata.get('history', [])))
+    history = parsed.metadata.get('history')
+    if not history and _is_canonical(parsed):
+        # Nothing to reset, so leave the file untouched
+        return 0, parsed
+
+    # Count how many were used (unique indices in history). Building the
+    # set happens entirely in C, which beats filling a bitmap from Python
+    reset_count = len(parsed.used_indices())
 
     # Clear history
     parsed.metadata['history'] = []
 
-    # Save the file
-    save_file(parsed)
+    # Save the file, rewriting only the metadata block
+    if not dry_run:
+        save_metadata(parsed, durable)
+
+    return reset_count, parsed
+
+
+def _is_canonical(parsed_file: ParsedFile) -> bool:
+    """
+    Check whether saving a parsed file would leave it unchanged.
+
+    Args:
+        parsed_file: ParsedFile as read from disk
+
+    Returns:
+        True if there is no legacy Used column and the metadata block, if
+        present, is exactly what quiver would write for the parsed metadata
+    """
+    headers = parsed_file.headers
+    if headers and headers[-1].lower() == 'used':
+        return False
+
+    span = parsed_file.metadata_span
+    if span is None:
+        return True
 
-    return reset_count
+    start, end = span
+    block = '\n'.join(MarkdownTableParser._format_metadata(parsed_file.metadata))
+    return parsed_file.raw_content[start:end] == block
@@ -1,23 +1,76 @@
 """Selector module for random entry selection."""
 
 import random
-from typing import List, Optional
+from itertools import compress
+from typing import Iterable, List, Optional
 
 from .parser import Entry
 
+# Random draws select_random_available makes before filtering the entries
+REJECTION_SAMPLING_TRIES = 8
 
-def get_available_entries(entries: List[Entry], history: List[int]) -> List[Entry]:
+# get_available_entries uses its byte mask while history has at most one
+# index per this many entries
+MASK_MAX_USED_RATIO = 4
+
+
+def get_available_entries(entries: List[Entry], history: Iterable[int]) -> List[Entry]:
     """
     Filter entries to only include unused ones.
 
     Args:
         entries: List of Entry objects
-        history: List of indices that have been used
+        history: Indices that have been used (list or set)
 
     Returns:
         List of Entry objects that are not in history
     """
-    return [entry for entry in entries if not entry.is_used(history)]
+    history = list(history)
+    total = len(entries)
+
+    # Fast path: when every used index points at the entry in that position
+    # (always true for parsed files), clear those slots in a byte mask and
+    # let compress() do the filtering in C. Each used index costs a Python
+    # level check, so once a large part of the list is used the set filter
+    # below is cheaper.
+    if len(history) * MASK_MAX_USED_RATIO <= total:
+        mask = bytearray(b'\x01') * total
+        for index in history:
+            if not (0 <= index < total and entries[index].row_index == index):
+                break
+            mask[index] = 0
+        else:
+            return list(compress(entries, mask))
+
+    used = frozenset(history)
+    return [entry for entry in entries if entry.row_index not in used]
+
+
+def count_available(entries: List[Entry], history: Iterable[int]) -> int:
+    """
+    Count unused entries without building the list of available entries.
+
+    When row indices are positions in the entries list (always true for
+    parsed files), only the used indices need to be examined, making the
+    count O(len(history)) instead of O(len(entries)). Other lists fall back
+    to counting the filtered list.
+
+    Args:
+        entries: List of Entry objects
+        history: Indices that have been used (list or set)
+
+    Returns:
+        Number of entries that are not in history
+    """
+    total = len(entries)
+    used = frozenset(history)
+
+    # An index past the end may still belong to an entry of a non-positional
+    # list, so anything that isn't the entry at its own position falls back
+    for index in used:
+        if not (0 <= index < total and entries[index].row_index == index):
+            return len(get_available_entries(entries, used))
+    return total - len(used)
 
 
 def select_random(entries: List[Entry]) -> Optional[Entry]:
@@ -36,16 +89,54 @@ def select_random(entries: List[Entry]) -> Optional[Entry]:
     return random.choice(entries)
 
 
-def select_random_available(entries: List[Entry], history: List[int]) -> Optional[Entry]:
+def select_random_available(entries: List[Entry], history: Iterable[int]) -> Optional[Entry]:
     """
     Select a random unused entry from the list.
 
     Args:
         entries: List of Entry objects
-        history: List of indices that have been used
+        history: Indices that have been used (list or set)
 
     Returns:
         Randomly selected unused Entry, or None if no unused entries
     """
-    available = get_available_entries(entries, history)
+    used = frozenset(history)
+
+    # Rejection sampling: draw uniformly from all entries and keep the first
+    # unused one. While most entries are unused this finds one in a couple of
+    # draws without building the available list, and the accepted entry is
+    # still uniform over the unused ones.
+    if entries:
+        for _ in range(REJECTION_SAMPLING_TRIES):
+            entry = random.choice(entries)
+            if entry.row_index not in used:
+                return entry
+
+    # Mostly used: fall back to choosing from the filtered list
+    available = get_available_entries(entries, used)
     return select_random(available)
+
+
+def select_random_available_many(
+    entries: List[Entry],
+    history: Iterable[int],
+    count: int
+) -> List[Entry]:
+    """
+    Select several distinct random unused entries in one pass.
+
+    Args:
+        entries: List of Entry objects
+        history: Indices that have been used (list or set)
+        count: Maximum number of entries to select
+
+    Returns:
+        Up to ``count`` distinct unused entries in random order (fewer if
+        not enough are available, empty if none are)
+    """
+    if count == 1:
+        entry = select_random_available(entries, history)
+        return [] if entry is None else [entry]
+
+    available = get_available_entries(entries, history)
+    return random.sample(available, min(count, len(available)))
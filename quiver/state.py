@@ -1,8 +1,8 @@
 """State management module for tracking entry usage."""
 
-from typing import Optional
+from typing import Iterable, Optional
 
-from .parser import Entry, ParsedFile, save_file
+from .parser import Entry, ParsedFile, save_file, save_metadata
 
 
 def add_to_history(parsed_file: ParsedFile, entry: Entry) -> None:
@@ -13,11 +13,8 @@ def add_to_history(parsed_file: ParsedFile, entry: Entry) -> None:
         parsed_file: ParsedFile to update
         entry: Entry that was selected
     """
-    if 'history' not in parsed_file.metadata:
-        parsed_file.metadata['history'] = []
-
     # Add to the end of history (most recent)
-    parsed_file.metadata['history'].append(entry.row_index)
+    parsed_file.metadata.setdefault('history', []).append(entry.row_index)
 
 
 def remove_from_history(parsed_file: ParsedFile) -> Optional[int]:
@@ -30,11 +27,12 @@ def remove_from_history(parsed_file: ParsedFile) -> Optional[int]:
     Returns:
         The index of the entry that was removed, or None if history is empty
     """
-    if 'history' not in parsed_file.metadata or not parsed_file.metadata['history']:
+    history = parsed_file.metadata.get('history')
+    if not history:
         return None
 
     # Remove from the end (most recent)
-    return parsed_file.metadata['history'].pop()
+    return history.pop()
 
 
 def find_entry_by_index(parsed_file: ParsedFile, index: int) -> Optional[Entry]:
@@ -48,7 +46,14 @@ def find_entry_by_index(parsed_file: ParsedFile, index: int) -> Optional[Entry]:
     Returns:
         Entry with matching index, or None if not found
     """
-    for entry in parsed_file.entries:
+    entries = parsed_file.entries
+
+    # Parsed files store entries in row order, so the index is normally the
+    # entry's position in the list
+    if 0 <= index < len(entries) and entries[index].row_index == index:
+        return entries[index]
+
+    for entry in entries:
         if entry.row_index == index:
             return entry
     return None
@@ -65,14 +70,38 @@ def pick_and_mark(parsed_file: ParsedFile, entry: Entry) -> None:
     add_to_history(parsed_file, entry)
 
 
-def save_state(parsed_file: ParsedFile) -> None:
+def pick_mark_save(
+    parsed_file: ParsedFile,
+    entries: Iterable[Entry],
+    durable: bool = False
+) -> None:
+    """
+    Mark selected entries as used and save the file in one step.
+
+    Like calling ``pick_and_mark`` for each entry followed by a single
+    ``save_state``, but looks up the history list only once. Since only the
+    history changes, just the metadata block is rewritten when the file
+    already has one.
+
+    Args:
+        parsed_file: ParsedFile to update
+        entries: Entries that were selected, in selection order
+        durable: fsync the file before replacing the original
+    """
+    history = parsed_file.metadata.setdefault('history', [])
+    history.extend(entry.row_index for entry in entries)
+    save_metadata(parsed_file, durable)
+
+
+def save_state(parsed_file: ParsedFile, durable: bool = False) -> None:
     """
     Save the current state back to the file.
 
     Args:
         parsed_file: ParsedFile to save
+        durable: fsync the file before replacing the original
     """
-    save_file(parsed_file)
+    save_file(parsed_file, durable)
 
 
 def validate_history(parsed_file: ParsedFile) -> None:
@@ -86,12 +115,13 @@ def validate_history(parsed_file: ParsedFile) -> None:
     Args:
         parsed_file: ParsedFile to validate and clean
     """
-    if 'history' not in parsed_file.metadata:
-        return
-
-    history = parsed_file.metadata['history']
+    history = parsed_file.metadata.get('history')
     num_entries = len(parsed_file.entries)
 
+    # Common case: every index is in bounds, so there is nothing to clean up
+    if not history or (min(history) >= 0 and max(history) < num_entries):
+        return
+
     # Filter out invalid indices (those that are out of bounds or negative)
     valid_history = [idx for idx in history if 0 <= idx < num_entries]
 
@@ -0,0 +1,28 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+
+def pytest_configure(config):
+    """Register the markers used by this suite."""
+    config.addinivalue_line(
+        'markers',
+        'slow: end-to-end workflows that write and re-read files several times'
+    )
+
+
+@pytest.fixture
+def write_list(tmp_path):
+    """
+    Return a function that writes a markdown list into the test's temp directory.
+
+    The function takes the file content and returns the path as a string,
+    ready to pass to parse_file or the CLI. tmp_path is removed by pytest,
+    so tests don't need to clean up after themselves.
+    """
+    def write(content):
+        path = tmp_path / 'list.md'
+        path.write_text(content)
+        return str(path)
+
+    return write
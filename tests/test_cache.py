@@ -0,0 +1,242 @@
+"""Tests for the cache module."""
+
+import os
+from collections import OrderedDict
+
+from quiver import cache
+from quiver.parser import parse_file, save_file
+
+
+def _write_table(path, rows):
+    """Write a table with the given number of rows."""
+    lines = ['| Entry | Category |', '|-------|----------|']
+    lines.extend(f'| Entry {i} | Category {i % 3} |' for i in range(rows))
+    path.write_text('\n'.join(lines) + '\n')
+
+
+def test_parse_file_uses_cache(tmp_path, monkeypatch):
+    """Test that an unchanged file is loaded from the cache."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 5)
+
+    parsed = parse_file(str(source))
+    assert len(list(cache_dir.iterdir())) == 1
+
+    cached = parse_file(str(source))
+    assert cached == parsed
+    # Callers get their own copy to mutate
+    assert cached is not parsed
+
+
+def test_parse_file_uses_memory_cache(tmp_path, monkeypatch):
+    """Test that repeat parses in one process skip the cache file too."""
+    from quiver.parser import MarkdownTableParser
+
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+    monkeypatch.setattr(cache, '_memory', OrderedDict())
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 5)
+    parsed = parse_file(str(source))
+
+    for cache_file in cache_dir.iterdir():
+        cache_file.unlink()
+
+    def fail_read(path):
+        raise AssertionError('file should have been loaded from memory')
+
+    monkeypatch.setattr(MarkdownTableParser, '_read_content', staticmethod(fail_read))
+    first = parse_file(str(source))
+    first.metadata['history'].append(0)
+    second = parse_file(str(source))
+
+    assert second == parsed
+    assert second.metadata['history'] == []
+
+
+def test_memory_cache_is_bounded(tmp_path, monkeypatch):
+    """Test that the in-memory cache evicts the least recently used file."""
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+    monkeypatch.setattr(cache, 'MEMORY_MAX_ENTRIES', 2)
+    monkeypatch.setattr(cache, '_memory', OrderedDict())
+
+    paths = []
+    for i in range(3):
+        source = tmp_path / f'list{i}.md'
+        _write_table(source, 2)
+        parse_file(str(source))
+        paths.append(str(source))
+
+    assert list(cache._memory) == paths[1:]
+
+
+def test_cache_invalidated_on_save(tmp_path, monkeypatch):
+    """Test that saving a file invalidates its cached parse."""
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+
+    parsed = parse_file(str(source))
+    parsed.metadata['history'] = [2]
+    save_file(parsed)
+
+    assert parse_file(str(source)).metadata['history'] == [2]
+
+
+def test_cache_invalidated_on_external_edit(tmp_path, monkeypatch):
+    """Test that editing the file outside quiver invalidates the cache."""
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    assert len(parse_file(str(source)).entries) == 3
+
+    _write_table(source, 4)
+    assert len(parse_file(str(source)).entries) == 4
+
+
+def test_cache_skips_small_files(tmp_path, monkeypatch):
+    """Test that files below MIN_SIZE are never cached."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    parse_file(str(source))
+
+    assert not cache_dir.exists()
+
+
+def test_cache_disabled(tmp_path, monkeypatch):
+    """Test that an empty cache directory setting disables caching."""
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, '')
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    assert cache.get_cache_dir() is None
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    assert len(parse_file(str(source)).entries) == 3
+
+
+def test_cache_ignores_corrupt_file(tmp_path, monkeypatch):
+    """Test that an unreadable cache file is treated as a miss."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    parse_file(str(source))
+
+    for cache_file in cache_dir.iterdir():
+        cache_file.write_bytes(b'not a pickle')
+
+    assert len(parse_file(str(source)).entries) == 3
+
+
+def test_rollback_and_reset_use_cache(tmp_path, monkeypatch):
+    """Test that rollback and reset load unchanged files from the cache."""
+    from quiver.parser import MarkdownTableParser
+    from quiver.rollback import reset_all, rollback_last
+
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    parsed = parse_file(str(source))
+    parsed.metadata['history'] = [0, 1]
+    save_file(parsed)
+    parse_file(str(source))
+
+    def fail_read(path):
+        raise AssertionError('file should have been loaded from the cache')
+
+    # Each command re-caches the file it saved, so the next one needs no parse
+    with monkeypatch.context() as m:
+        m.setattr(MarkdownTableParser, '_read_content', staticmethod(fail_read))
+        entry, _ = rollback_last(str(source))
+    assert entry.content == 'Entry 1'
+
+    with monkeypatch.context() as m:
+        m.setattr(MarkdownTableParser, '_read_content', staticmethod(fail_read))
+        count, _ = reset_all(str(source))
+    assert count == 1
+    assert parse_file(str(source)).metadata['history'] == []
+
+
+def test_second_pick_uses_cache(tmp_path, monkeypatch, capsys):
+    """Test that a pick re-caches the file it saved for the next command."""
+    from quiver.cli import main
+    from quiver.parser import MarkdownTableParser
+
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+    monkeypatch.setattr(cache, '_memory', OrderedDict())
+
+    # A pick appends to an existing metadata block; the first pick on a
+    # bare table rewrites the whole file instead, which is never re-cached
+    source = tmp_path / 'list.md'
+    _write_table(source, 5)
+    save_file(parse_file(str(source), cache_result=False))
+    assert main(['pick', str(source)]) == 0
+
+    # Start the second pick from the cache file alone, as a new process would
+    cache._memory.clear()
+
+    def fail_read(path):
+        raise AssertionError('file should have been loaded from the cache')
+
+    with monkeypatch.context() as m:
+        m.setattr(MarkdownTableParser, '_read_content', staticmethod(fail_read))
+        assert main(['pick', str(source)]) == 0
+
+    assert len(parse_file(str(source)).metadata['history']) == 2
+    assert len(list(cache_dir.iterdir())) == 1
+
+
+def test_parse_file_without_caching(tmp_path, monkeypatch):
+    """Test that cache_result=False leaves the cache untouched."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+    monkeypatch.setattr(cache, '_memory', OrderedDict())
+
+    source = tmp_path / 'list.md'
+    _write_table(source, 3)
+    assert len(parse_file(str(source), cache_result=False).entries) == 3
+
+    assert not cache_dir.exists()
+    assert not cache._memory
+
+
+def test_disk_cache_is_bounded(tmp_path, monkeypatch):
+    """Test that the oldest cache files are removed past DISK_MAX_ENTRIES."""
+    cache_dir = tmp_path / 'cache'
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(cache_dir))
+    monkeypatch.setattr(cache, 'MIN_SIZE', 0)
+    monkeypatch.setattr(cache, 'DISK_MAX_ENTRIES', 2)
+
+    cache_paths = []
+    for i in range(3):
+        source = tmp_path / f'list{i}.md'
+        _write_table(source, 2)
+        parse_file(str(source))
+        cache_path = cache._cache_path(cache_dir, str(source))
+        # Give each cache file a distinct age regardless of timestamp resolution
+        os.utime(cache_path, ns=(i * 10**9, i * 10**9))
+        cache_paths.append(cache_path)
+
+    assert sorted(cache_dir.iterdir()) == sorted(cache_paths[1:])
@@ -1,26 +1,64 @@
 """Integration tests for the CLI."""
 
-import tempfile
-from pathlib import Path
-from io import StringIO
-import sys
+import os
+import stat
+
+import pytest
 
 from quiver.cli import main
+from quiver.parser import parse_file
 
+# Lists for commands that only read the file, written once per session
+SAMPLES = {
+    'unused': """| Entry | Used |
+|-------|------|
+| First | [ ] |
+""",
+    'all_used': """| Entry |
+|-------|
+| First |
+| Second |
 
-def capture_output(func, *args):
-    """Capture stdout output from a function."""
-    old_stdout = sys.stdout
-    sys.stdout = StringIO()
-    try:
-        result = func(*args)
-        output = sys.stdout.getvalue()
-        return result, output
-    finally:
-        sys.stdout = old_stdout
+<!-- QUIVER_METADATA
+history: [0, 1]
+-->
+""",
+    'partly_used': """| Entry | Category |
+|-------|----------|
+| First | Personal |
+| Second | Work |
+| Third | Personal |
+
+<!-- QUIVER_METADATA
+history: [0]
+-->
+""",
+}
 
 
-def test_cli_pick():
+def run(capsys, argv):
+    """Run the CLI and return its exit code and captured stdout."""
+    exit_code = main(argv)
+    return exit_code, capsys.readouterr().out
+
+
+@pytest.fixture(scope='session')
+def sample_files(tmp_path_factory):
+    """Write each of SAMPLES to disk once for the whole test session.
+
+    Tests using these files must not modify them; tests that change a list
+    write their own copy with write_list().
+    """
+    directory = tmp_path_factory.mktemp('samples')
+    files = {}
+    for name, content in SAMPLES.items():
+        path = directory / f'{name}.md'
+        path.write_text(content)
+        files[name] = path
+    return files
+
+
+def test_cli_pick(write_list, capsys):
     """Test the pick command."""
     content = """| Entry | Category | Used |
 |-------|----------|------|
@@ -29,265 +67,286 @@ def test_cli_pick():
 | Third | Personal | [ ] |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        # Run pick command
-        exit_code, output = capture_output(main, ['pick', temp_path])
+    temp_path = write_list(content)
 
-        assert exit_code == 0
-        assert '🎯' in output
-        assert 'Category:' in output
+    # Run pick command
+    exit_code, output = run(capsys, ['pick', temp_path])
 
-        # Verify one entry is now used
-        from quiver.parser import parse_file
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        used_count = sum(1 for e in parsed.entries if e.is_used(history))
-        assert used_count == 1
+    assert exit_code == 0
+    assert '🎯' in output
+    assert 'Category:' in output
 
-    finally:
-        Path(temp_path).unlink()
+    # Verify one entry is now used
+    parsed = parse_file(temp_path)
+    used_count = len(parsed.used_indices().intersection(range(len(parsed.entries))))
+    assert used_count == 1
 
 
-def test_cli_pick_all_used():
+def test_cli_pick_all_used(sample_files, capsys):
     """Test pick when all entries are used."""
-    content = """| Entry |
-|-------|
-| First |
-| Second |
+    exit_code, output = run(capsys, ['pick', str(sample_files['all_used'])])
 
-<!-- QUIVER_METADATA
-history: [0, 1]
--->
-"""
+    assert exit_code == 1
+    assert 'No unused entries' in output
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
 
-    try:
-        exit_code, output = capture_output(main, ['pick', temp_path])
+def test_cli_pick_dry_run(sample_files, capsys):
+    """Test pick with --dry-run flag."""
+    temp_path = str(sample_files['unused'])
 
-        assert exit_code == 1
-        assert 'No unused entries' in output
+    exit_code, output = run(capsys, ['--dry-run', 'pick', temp_path])
 
-    finally:
-        Path(temp_path).unlink()
+    assert exit_code == 0
+    assert 'Dry run' in output
 
+    # Verify no changes were made
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(e.row_index for e in parsed.entries)
 
-def test_cli_pick_dry_run():
-    """Test pick with --dry-run flag."""
-    content = """| Entry | Used |
-|-------|------|
-| First | [ ] |
+
+def test_cli_pick_count(write_list, capsys):
+    """Test picking several distinct entries in one invocation."""
+    content = """| Entry | Category |
+|-------|----------|
+| First | Personal |
+| Second | Work |
+| Third | Personal |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        exit_code, output = capture_output(main, ['--dry-run', 'pick', temp_path])
+    exit_code, output = run(capsys, ['pick', '--count', '2', temp_path])
 
-        assert exit_code == 0
-        assert 'Dry run' in output
+    assert exit_code == 0
+    assert output.count('🎯') == 2
 
-        # Verify no changes were made
-        from quiver.parser import parse_file
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not e.is_used(history) for e in parsed.entries)
+    # Both picks are recorded, and they are distinct
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert len(history) == 2
+    assert len(set(history)) == 2
 
-    finally:
-        Path(temp_path).unlink()
+    # Asking for more than remain picks what is left
+    exit_code, output = run(capsys, ['pick', '-n', '5', temp_path])
 
+    assert exit_code == 0
+    assert output.count('🎯') == 1
+    assert 'Only 1 unused entries' in output
+    assert sorted(parse_file(temp_path).metadata['history']) == [0, 1, 2]
 
-def test_cli_rollback():
-    """Test the rollback command."""
-    content = """| Entry |
-|-------|
-| First |
 
+def test_cli_pick_keeps_table_formatting(tmp_path, write_list, capsys):
+    """Test that picking only rewrites the metadata block of a tracked file."""
+    table = """# Prompts
+
+| Entry  | Category |
+|:-------|---------:|
+| First  | Personal |
+| Second | Work     |
+"""
+    content = table + """
 <!-- QUIVER_METADATA
 history: [0]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        exit_code, output = capture_output(main, ['rollback', temp_path])
-
-        assert exit_code == 0
-        assert 'Rolled back' in output
-        assert 'First' in output
+    temp_path = write_list(content)
 
-        # Verify entry is now unused
-        from quiver.parser import parse_file
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not e.is_used(history) for e in parsed.entries)
-        assert parsed.metadata['history'] == []
+    exit_code, _ = run(capsys, ['pick', temp_path])
+    assert exit_code == 0
+    assert (tmp_path / 'list.md').read_text() == table + """
+<!-- QUIVER_METADATA
+history: [0, 1]
+-->
+"""
 
-    finally:
-        Path(temp_path).unlink()
+    exit_code, _ = run(capsys, ['reset', temp_path])
+    assert exit_code == 0
+    assert (tmp_path / 'list.md').read_text().startswith(table)
 
 
-def test_cli_rollback_empty():
-    """Test rollback when history is empty."""
+def test_cli_drops_legacy_used_column(tmp_path, write_list, capsys):
+    """Test that the first write to a tracked legacy file drops the Used column."""
     content = """| Entry | Used |
 |-------|------|
-| First | [ ] |
-"""
+| A | [x] |
+| B | [ ] |
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+<!-- QUIVER_METADATA
+history: [0]
+-->
+"""
 
-    try:
-        exit_code, output = capture_output(main, ['rollback', temp_path])
+    temp_path = write_list(content)
 
+    for command in ('pick', 'rollback', 'reset'):
+        exit_code, _ = run(capsys, [command, temp_path])
         assert exit_code == 0
-        assert 'No entries to rollback' in output
 
-    finally:
-        Path(temp_path).unlink()
+    saved = (tmp_path / 'list.md').read_text()
+    assert 'Used' not in saved
+    assert '[x]' not in saved
+    assert parse_file(temp_path).metadata['history'] == []
 
 
-def test_cli_reset():
-    """Test the reset command."""
+def test_cli_pick_durable(monkeypatch, write_list, capsys):
+    """Test that --durable fsyncs the file and then its directory."""
+    content = """| Entry |
+|-------|
+| First |
+"""
+
+    synced = []
+    real_fsync = os.fsync
+
+    def tracking_fsync(fd):
+        synced.append('dir' if stat.S_ISDIR(os.fstat(fd).st_mode) else 'file')
+        real_fsync(fd)
+
+    monkeypatch.setattr(os, 'fsync', tracking_fsync)
+
+    temp_path = write_list(content)
+
+    exit_code, _ = run(capsys, ['pick', temp_path])
+    assert exit_code == 0
+    assert synced == []
+
+    exit_code, _ = run(capsys, ['--durable', 'rollback', temp_path])
+    assert exit_code == 0
+    assert synced == ['file', 'dir']
+
+
+def test_cli_rollback(write_list, capsys):
+    """Test the rollback command."""
     content = """| Entry |
 |-------|
 | First |
-| Second |
-| Third |
 
 <!-- QUIVER_METADATA
-history: [0, 1]
+history: [0]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        exit_code, output = capture_output(main, ['reset', temp_path])
+    exit_code, output = run(capsys, ['rollback', temp_path])
 
-        assert exit_code == 0
-        assert 'Reset complete' in output
-        assert '2 entries' in output
-
-        # Verify all entries are now unused
-        from quiver.parser import parse_file
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not e.is_used(history) for e in parsed.entries)
+    assert exit_code == 0
+    assert 'Rolled back' in output
+    assert 'First' in output
 
-    finally:
-        Path(temp_path).unlink()
+    # Verify entry is now unused
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(e.row_index for e in parsed.entries)
+    assert history == []
 
 
-def test_cli_reset_already_unused():
-    """Test reset when all entries are already unused."""
+def test_cli_rollback_empty(write_list, capsys):
+    """Test rollback when history is empty."""
     content = """| Entry | Used |
 |-------|------|
 | First | [ ] |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        exit_code, output = capture_output(main, ['reset', temp_path])
+    exit_code, output = run(capsys, ['rollback', temp_path])
 
-        assert exit_code == 0
-        assert 'already unused' in output
+    assert exit_code == 0
+    assert 'No entries to rollback' in output
 
-    finally:
-        Path(temp_path).unlink()
 
+def test_cli_rollback_and_reset_dry_run(sample_files, capsys):
+    """Test rollback and reset with --dry-run leave the file untouched."""
+    path = sample_files['all_used']
 
-def test_cli_status():
-    """Test the status command."""
-    content = """| Entry | Category |
-|-------|----------|
-| First | Personal |
-| Second | Work |
-| Third | Personal |
+    exit_code, output = run(capsys, ['--dry-run', 'rollback', str(path)])
+    assert exit_code == 0
+    assert 'Would rollback: "Second"' in output
+
+    exit_code, output = run(capsys, ['--dry-run', 'reset', str(path)])
+    assert exit_code == 0
+    assert 'Would reset 2 of 2 entries' in output
+
+    assert path.read_text() == SAMPLES['all_used']
+
+
+def test_cli_reset(write_list, capsys):
+    """Test the reset command."""
+    content = """| Entry |
+|-------|
+| First |
+| Second |
+| Third |
 
 <!-- QUIVER_METADATA
-history: [0]
+history: [0, 1]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        exit_code, output = capture_output(main, ['status', temp_path])
+    exit_code, output = run(capsys, ['reset', temp_path])
 
-        assert exit_code == 0
-        assert '📊 Status' in output
-        assert '1/3' in output
-        assert '2 remaining' in output
+    assert exit_code == 0
+    assert 'Reset complete' in output
+    assert '2 entries' in output
 
-    finally:
-        Path(temp_path).unlink()
+    # Verify all entries are now unused
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(e.row_index for e in parsed.entries)
 
 
-def test_cli_status_verbose():
-    """Test status with verbose flag."""
-    content = """| Entry | Category |
-|-------|----------|
-| First | Personal |
-| Second | Work |
+def test_cli_reset_already_unused(sample_files, capsys):
+    """Test reset when all entries are already unused."""
+    exit_code, output = run(capsys, ['reset', str(sample_files['unused'])])
 
-<!-- QUIVER_METADATA
-history: [0, 1]
--->
-"""
+    assert exit_code == 0
+    assert 'already unused' in output
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
 
-    try:
-        exit_code, output = capture_output(main, ['--verbose', 'status', temp_path])
+def test_cli_status(sample_files, capsys):
+    """Test the status command."""
+    exit_code, output = run(capsys, ['status', str(sample_files['partly_used'])])
 
-        assert exit_code == 0
-        assert 'History' in output
-        assert 'Category' in output  # Metadata columns
+    assert exit_code == 0
+    assert '📊 Status' in output
+    assert '1/3' in output
+    assert '2 remaining' in output
 
-    finally:
-        Path(temp_path).unlink()
 
+def test_cli_status_verbose(sample_files, capsys):
+    """Test status with verbose flag."""
+    exit_code, output = run(
+        capsys, ['--verbose', 'status', str(sample_files['partly_used'])]
+    )
+
+    assert exit_code == 0
+    assert 'History' in output
+    assert 'Category' in output  # Metadata columns
 
-def test_cli_file_not_found():
+
+def test_cli_file_not_found(capsys):
     """Test handling of non-existent file."""
-    exit_code, output = capture_output(main, ['pick', '/nonexistent/file.md'])
+    exit_code, output = run(capsys, ['pick', '/nonexistent/file.md'])
 
     assert exit_code == 1
     assert 'not found' in output.lower()
 
 
-def test_cli_version():
+def test_cli_version(capsys):
     """Test --version flag."""
-    try:
-        exit_code, output = capture_output(main, ['--version'])
-    except SystemExit as e:
-        # argparse --version calls sys.exit(0)
-        assert e.code == 0
+    # argparse --version calls sys.exit(0)
+    with pytest.raises(SystemExit) as excinfo:
+        run(capsys, ['--version'])
+    assert excinfo.value.code == 0
 
 
-def test_cli_full_workflow():
+@pytest.mark.slow
+def test_cli_full_workflow(write_list, capsys):
     """Test a complete workflow: pick -> status -> rollback -> reset."""
     content = """| Entry | Category | Used |
 |-------|----------|------|
@@ -296,63 +355,42 @@ def test_cli_full_workflow():
 | Third | A | [ ] |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        # Pick an entry
-        exit_code, output = capture_output(main, ['pick', temp_path])
-        assert exit_code == 0
-        assert '🎯' in output
+    # Pick an entry
+    exit_code, output = run(capsys, ['pick', temp_path])
+    assert exit_code == 0
+    assert '🎯' in output
 
-        # Check status
-        exit_code, output = capture_output(main, ['status', temp_path])
-        assert exit_code == 0
-        assert '1/3' in output
+    # Check status
+    exit_code, output = run(capsys, ['status', temp_path])
+    assert exit_code == 0
+    assert '1/3' in output
 
-        # Pick another
-        exit_code, output = capture_output(main, ['pick', temp_path])
-        assert exit_code == 0
+    # Pick another
+    exit_code, output = run(capsys, ['pick', temp_path])
+    assert exit_code == 0
 
-        # Check status
-        exit_code, output = capture_output(main, ['status', temp_path])
-        assert exit_code == 0
-        assert '2/3' in output
+    # Check status
+    exit_code, output = run(capsys, ['status', temp_path])
+    assert exit_code == 0
+    assert '2/3' in output
 
-        # Rollback one
-        exit_code, output = capture_output(main, ['rollback', temp_path])
-        assert exit_code == 0
+    # Rollback one
+    exit_code, output = run(capsys, ['rollback', temp_path])
+    assert exit_code == 0
 
-        # Check status
-        exit_code, output = capture_output(main, ['status', temp_path])
-        assert exit_code == 0
-        assert '1/3' in output
+    # Check status
+    exit_code, output = run(capsys, ['status', temp_path])
+    assert exit_code == 0
+    assert '1/3' in output
 
-        # Reset all
-        exit_code, output = capture_output(main, ['reset', temp_path])
-        assert exit_code == 0
+    # Reset all
+    exit_code, output = run(capsys, ['reset', temp_path])
+    assert exit_code == 0
+
+    # Check status
+    exit_code, output = run(capsys, ['status', temp_path])
+    assert exit_code == 0
+    assert '0/3' in output
 
-        # Check status
-        exit_code, output = capture_output(main, ['status', temp_path])
-        assert exit_code == 0
-        assert '0/3' in output
-
-    finally:
-        Path(temp_path).unlink()
-
-
-if __name__ == '__main__':
-    test_cli_pick()
-    test_cli_pick_all_used()
-    test_cli_pick_dry_run()
-    test_cli_rollback()
-    test_cli_rollback_empty()
-    test_cli_reset()
-    test_cli_reset_already_unused()
-    test_cli_status()
-    test_cli_status_verbose()
-    test_cli_file_not_found()
-    test_cli_full_workflow()
-
-    print("All CLI tests passed!")
@@ -1,20 +1,49 @@
 """Tests for the parser module."""
 
-import tempfile
+import os
+import re
+import threading
 from pathlib import Path
 
+import pytest
+
 from quiver.parser import (
     Entry,
     ParsedFile,
     MarkdownTableParser,
     parse_file,
-    save_file
+    parse_string,
+    save_file,
+    save_metadata
 )
 
+EXAMPLES_DIR = Path(__file__).parent.parent / 'examples'
 
-def test_parse_simple_table():
-    """Test parsing a simple markdown table."""
-    content = """# Test Table
+# Header rows written by the serializer, found in one pass over its output
+HEADER_LINE_PATTERN = re.compile(r'^\| Entry .*\|$', re.MULTILINE)
+
+
+@pytest.fixture(scope='session')
+def parsed_examples():
+    """Parse each example file once for the whole test session."""
+    return {
+        path.name: parse_file(str(path))
+        for path in sorted(EXAMPLES_DIR.glob('*.md'))
+    }
+
+
+@pytest.fixture(scope='module')
+def md_path(tmp_path_factory):
+    """Path to a markdown file shared by this module's file-based tests.
+
+    Each test writes its own content before parsing, so no state carries
+    over between tests.
+    """
+    return tmp_path_factory.mktemp('parser') / 'list.md'
+
+
+SIMPLE_TABLE_FORMATS = {
+    'history': """# Test Table
 
 | Entry | Category |
 |-------|----------|
@@ -22,45 +51,73 @@ def test_parse_simple_table():
 | Second entry | Work |
 | Third entry | Personal |
 
+<!-- QUIVER_METADATA
+history: [1]
+-->
+""",
+    # Files from before history tracking also carry a Used checkbox column
+    'used_column': """# Test Table
+
+| Entry | Category | Used |
+|-------|----------|------|
+| First entry | Personal | [ ] |
+| Second entry | Work | [x] |
+| Third entry | Personal | [ ] |
+
+<!-- QUIVER_METADATA
+history: [1]
+-->
+""",
+}
+
+
+MY_LIST_CONTENT = """# My List
+
+| Entry | Category |
+|-------|----------|
+| First entry | Personal |
+| Second entry | Work |
+
 <!-- QUIVER_METADATA
 history: [1]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
 
-    try:
-        parsed = parse_file(temp_path)
+@pytest.mark.parametrize('table_format', sorted(SIMPLE_TABLE_FORMATS))
+def test_parse_simple_table(table_format):
+    """Test parsing a simple markdown table."""
+    content = SIMPLE_TABLE_FORMATS[table_format]
 
-        # Check headers
-        assert parsed.headers == ['Entry', 'Category']
+    parsed = parse_string(content)
 
-        # Check entries
-        assert len(parsed.entries) == 3
+    # Check headers (the legacy Used column is kept on parse)
+    if table_format == 'used_column':
+        assert parsed.headers == ['Entry', 'Category', 'Used']
+    else:
+        assert parsed.headers == ['Entry', 'Category']
 
-        # Check history
-        history = parsed.metadata.get('history', [])
-        assert history == [1]
+    # Check entries
+    assert len(parsed.entries) == 3
 
-        # First entry
-        assert parsed.entries[0].content == 'First entry'
-        assert parsed.entries[0].metadata == {'Category': 'Personal'}
-        assert parsed.entries[0].is_used(history) is False
+    # Check history
+    history = parsed.metadata['history']
+    assert history == [1]
 
-        # Second entry (marked as used in history)
-        assert parsed.entries[1].content == 'Second entry'
-        assert parsed.entries[1].metadata == {'Category': 'Work'}
-        assert parsed.entries[1].is_used(history) is True
+    # First entry
+    assert parsed.entries[0].content == 'First entry'
+    assert parsed.entries[0].metadata == {'Category': 'Personal'}
+    assert parsed.entries[0].is_used(history) is False
 
-        # Third entry
-        assert parsed.entries[2].content == 'Third entry'
-        assert parsed.entries[2].metadata == {'Category': 'Personal'}
-        assert parsed.entries[2].is_used(history) is False
+    # Second entry (marked as used in history)
+    assert parsed.entries[1].content == 'Second entry'
+    assert parsed.entries[1].metadata == {'Category': 'Work'}
+    assert parsed.entries[1].is_used(history) is True
 
-    finally:
-        Path(temp_path).unlink()
+    # Third entry
+    assert parsed.entries[2].content == 'Third entry'
+    assert parsed.entries[2].metadata == {'Category': 'Personal'}
+    assert parsed.entries[2].is_used(history) is False
 
 
 def test_parse_table_with_multiple_metadata_columns():
@@ -75,60 +132,56 @@ history: [1]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    parsed = parse_string(content)
 
-    try:
-        parsed = parse_file(temp_path)
-
-        assert len(parsed.entries) == 2
-        history = parsed.metadata.get('history', [])
-
-        # First entry
-        assert parsed.entries[0].content == "Mario's Pizza"
-        assert parsed.entries[0].metadata == {
-            'Cuisine': 'Italian',
-            'Price': '$$'
-        }
-        assert parsed.entries[0].is_used(history) is False
-
-        # Second entry
-        assert parsed.entries[1].content == 'Sushi House'
-        assert parsed.entries[1].metadata == {
-            'Cuisine': 'Japanese',
-            'Price': '$$$'
-        }
-        assert parsed.entries[1].is_used(history) is True
+    assert len(parsed.entries) == 2
+    history = parsed.metadata['history']
 
-    finally:
-        Path(temp_path).unlink()
+    # First entry
+    assert parsed.entries[0].content == "Mario's Pizza"
+    assert parsed.entries[0].metadata == {
+        'Cuisine': 'Italian',
+        'Price': '$$'
+    }
+    assert parsed.entries[0].is_used(history) is False
+
+    # Second entry
+    assert parsed.entries[1].content == 'Sushi House'
+    assert parsed.entries[1].metadata == {
+        'Cuisine': 'Japanese',
+        'Price': '$$$'
+    }
+    assert parsed.entries[1].is_used(history) is True
 
 
-def test_parse_table_with_metadata():
-    """Test parsing a table with QUIVER_METADATA."""
-    content = """| Entry | Category |
+METADATA_TABLE = """| Entry | Category |
 |-------|----------|
 | First entry | Personal |
 | Second entry | Work |
-
-<!-- QUIVER_METADATA
-history: [0]
--->
+| Third entry | Personal |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
 
-    try:
-        parsed = parse_file(temp_path)
+@pytest.mark.parametrize('metadata_line, expected_history', [
+    ('history: [0]', [0]),
+    ('history: []', []),
+    (None, []),
+    ('history: [2, 0, 2]', [2, 0, 2]),
+    ('history: [\'1\', "0"]', [1, 0]),
+    ('history: [1, 0,]', [1, 0]),
+    ('history: [First entry, Work]', []),
+], ids=['single', 'empty', 'no-metadata', 'duplicates', 'quoted', 'trailing-comma',
+        'legacy-strings'])
+def test_parse_metadata(metadata_line, expected_history):
+    """Test parsing QUIVER_METADATA history in its accepted forms."""
+    content = METADATA_TABLE
+    if metadata_line is not None:
+        content += f"\n<!-- QUIVER_METADATA\n{metadata_line}\n-->\n"
 
-        assert len(parsed.entries) == 2
-        assert parsed.metadata['history'] == [0]
+    parsed = parse_string(content)
 
-    finally:
-        Path(temp_path).unlink()
+    assert len(parsed.entries) == 3
+    assert parsed.metadata['history'] == expected_history
 
 
 def test_serialize_file():
@@ -159,7 +212,7 @@ def test_serialize_file():
     result = MarkdownTableParser.serialize_file(parsed)
 
     # Check that it contains expected parts
-    assert '| Entry | Category |' in result
+    assert HEADER_LINE_PATTERN.findall(result) == ['| Entry | Category |']
     assert '| First entry | Personal |' in result
     assert '| Second entry | Work |' in result
     assert '<!-- QUIVER_METADATA' in result
@@ -168,137 +221,215 @@ def test_serialize_file():
     assert 'Used' not in result
 
 
-def test_round_trip():
-    """Test parsing and serializing maintains data integrity."""
-    original_content = """# My List
+def test_serialize_missing_metadata_values():
+    """Test serializing entries that lack some or all metadata columns."""
+    entries = [
+        Entry(content='Full', metadata={'Category': 'Work', 'Tags': 'x'}, row_index=0),
+        Entry(content='Short', metadata={'Category': 'Home'}, row_index=1),
+        Entry(content='Bare', metadata={}, row_index=2)
+    ]
+    parsed = ParsedFile(entries=entries, headers=['Entry', 'Category', 'Tags'])
 
-| Entry | Category |
-|-------|----------|
-| First entry | Personal |
-| Second entry | Work |
+    lines = MarkdownTableParser.serialize_file(parsed).split('\n')
+    assert lines[-3:] == [
+        '| Full | Work | x |',
+        '| Short | Home |  |',
+        '| Bare |  |  |'
+    ]
 
-<!-- QUIVER_METADATA
-history: [1]
--->
-"""
+    # A single metadata column and no metadata columns at all
+    parsed = ParsedFile(entries=entries, headers=['Entry', 'Category'])
+    assert MarkdownTableParser.serialize_file(parsed).split('\n')[-3:] == [
+        '| Full | Work |', '| Short | Home |', '| Bare |  |'
+    ]
+    parsed = ParsedFile(entries=entries, headers=['Entry'])
+    assert MarkdownTableParser.serialize_file(parsed).split('\n')[-3:] == [
+        '| Full |', '| Short |', '| Bare |'
+    ]
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(original_content)
-        temp_path = f.name
 
-    try:
-        # Parse
-        parsed = parse_file(temp_path)
+def test_entry_uses_slots():
+    """Test that entries carry no per-instance __dict__."""
+    entry = Entry(content='First', metadata={}, row_index=0)
 
-        # Verify parsed data
-        assert len(parsed.entries) == 2
-        assert parsed.entries[0].content == 'First entry'
-        history = parsed.metadata.get('history', [])
-        assert parsed.entries[0].is_used(history) is False
-        assert parsed.entries[1].content == 'Second entry'
-        assert parsed.entries[1].is_used(history) is True
-        assert parsed.metadata['history'] == [1]
+    assert not hasattr(entry, '__dict__')
+    with pytest.raises(AttributeError):
+        entry.used = True
 
-        # Modify history (mark first entry as used too)
-        parsed.metadata['history'].insert(0, 0)
 
-        # Save back
-        save_file(parsed)
+def test_used_indices():
+    """Test that used_indices deduplicates history into a set."""
+    parsed = ParsedFile(
+        entries=[],
+        headers=[],
+        metadata={'history': [2, 0, 2, 1, 0]}
+    )
+    assert parsed.used_indices() == frozenset({0, 1, 2})
 
-        # Re-parse
-        parsed2 = parse_file(temp_path)
-        history2 = parsed2.metadata.get('history', [])
+    # Missing history means nothing is used
+    assert ParsedFile(entries=[], headers=[]).used_indices() == frozenset()
 
-        # Verify changes persisted
-        assert parsed2.entries[0].is_used(history2) is True
-        assert parsed2.entries[1].is_used(history2) is True
-        assert parsed2.metadata['history'] == [0, 1]
 
-    finally:
-        Path(temp_path).unlink()
+def test_round_trip(md_path):
+    """Test parsing and serializing maintains data integrity."""
 
+    md_path.write_text(MY_LIST_CONTENT)
+    temp_path = str(md_path)
 
-def test_parse_empty_metadata():
-    """Test parsing a file with empty QUIVER_METADATA."""
-    content = """| Entry | Category |
-|-------|----------|
-| Test | Personal |
+    # Parse
+    parsed = parse_file(temp_path)
 
-<!-- QUIVER_METADATA
-history: []
--->
-"""
+    # Verify parsed data
+    assert len(parsed.entries) == 2
+    assert parsed.entries[0].content == 'First entry'
+    history = parsed.metadata['history']
+    assert parsed.entries[0].is_used(history) is False
+    assert parsed.entries[1].content == 'Second entry'
+    assert parsed.entries[1].is_used(history) is True
+    assert history == [1]
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    # Modify history (mark first entry as used too)
+    history.insert(0, 0)
 
-    try:
-        parsed = parse_file(temp_path)
-        assert parsed.metadata['history'] == []
+    # Save back
+    save_file(parsed)
 
-    finally:
-        Path(temp_path).unlink()
+    # Re-parse
+    parsed2 = parse_file(temp_path)
+    history2 = parsed2.metadata['history']
 
+    # Verify changes persisted
+    assert parsed2.entries[0].is_used(history2) is True
+    assert parsed2.entries[1].is_used(history2) is True
+    assert history2 == [0, 1]
 
-def test_parse_no_metadata():
-    """Test parsing a file without QUIVER_METADATA."""
-    content = """| Entry | Category |
-|-------|----------|
-| Test | Personal |
-"""
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+def test_parse_string(md_path):
+    """Test parsing in-memory content matches parsing the same file."""
 
-    try:
-        parsed = parse_file(temp_path)
-        assert parsed.metadata['history'] == []
+    parsed = parse_string(MY_LIST_CONTENT)
+    assert [e.content for e in parsed.entries] == ['First entry', 'Second entry']
+    assert parsed.entries[1].metadata == {'Category': 'Work'}
+    assert parsed.metadata['history'] == [1]
+    assert parsed.filepath == ''
+
+    # Windows line endings are normalized just like when reading a file
+    assert parse_string(MY_LIST_CONTENT.replace('\n', '\r\n')) == parsed
+
+    # Serializing and re-parsing round-trips without touching disk
+    reparsed = parse_string(MarkdownTableParser.serialize_file(parsed))
+    assert reparsed.entries == parsed.entries
+    assert reparsed.metadata == parsed.metadata
 
+    md_path.write_text(MY_LIST_CONTENT)
+    from_file = parse_file(str(md_path))
+    assert parse_string(MY_LIST_CONTENT, from_file.filepath) == from_file
+
+
+def test_save_file_is_atomic_replace(tmp_path):
+    """Test saving replaces the file in place without leaving temp files."""
+    content = """| Entry |
+|-------|
+| First |
+"""
+
+    target = tmp_path / 'list.md'
+    target.write_text(content)
+    link = tmp_path / 'link.md'
+    link.symlink_to(target)
+
+    parsed = parse_file(str(link))
+    parsed.metadata['history'] = [0]
+    save_file(parsed)
+
+    # The symlink still points at the real file, which got the update
+    assert link.is_symlink()
+    assert parse_file(str(target)).metadata['history'] == [0]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['link.md', 'list.md']
+
+
+@pytest.mark.parametrize('content', [
+    MY_LIST_CONTENT,
+    SIMPLE_TABLE_FORMATS['used_column'],
+    "<!-- QUIVER_METADATA\nhistory: [0]\n-->\n\n# T\n\n| Entry |\n|---|\n| a |\n",
+    "| Entry |\n|---|\n| a |\n",
+], ids=['heading', 'used_column', 'metadata_first', 'no_metadata'])
+def test_save_file_then_save_metadata(md_path, content):
+    """Test that save_file leaves the object describing what it wrote."""
+    md_path.write_text(content)
+    parsed = parse_file(str(md_path))
+    parsed.entries.append(Entry(content='added', metadata={}, row_index=len(parsed.entries)))
+    parsed.metadata.setdefault('history', []).append(0)
+    save_file(parsed)
+
+    written = md_path.read_text()
+    reparsed = parse_string(written, parsed.filepath)
+    assert parsed.raw_content == written
+    assert parsed.headers == reparsed.headers
+    assert parsed.table_offset == reparsed.table_offset
+    assert parsed.metadata_span == reparsed.metadata_span
+
+    # A metadata-only save now builds on the full save instead of undoing it
+    parsed.metadata['history'].append(len(parsed.entries) - 1)
+    save_metadata(parsed)
+    reparsed = parse_file(str(md_path))
+    assert reparsed.entries[-1].content == 'added'
+    assert reparsed.metadata['history'] == parsed.metadata['history']
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='needs named pipes')
+def test_parse_file_from_pipe(tmp_path):
+    """Test parsing a pipe, which has no size to read or advise on."""
+    fifo = tmp_path / 'list.fifo'
+    os.mkfifo(fifo)
+
+    # Larger than one read chunk, so the content arrives over several reads
+    rows = ''.join(f'| Entry {i} |\n' for i in range(20000))
+    content = '| Entry |\n|-------|\n' + rows
+
+    def write():
+        with open(fifo, 'w') as f:
+            f.write(content)
+
+    # If parse_file fails before opening the pipe, the writer blocks in
+    # open() forever; as a daemon with a timed join it can't hang the suite
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    try:
+        parsed = parse_file(str(fifo))
     finally:
-        Path(temp_path).unlink()
+        writer.join(timeout=10)
+    assert not writer.is_alive()
+
+    assert len(parsed.entries) == 20000
+    assert parsed.entries[-1].content == 'Entry 19999'
 
 
 def test_parse_file_not_found():
     """Test parsing a non-existent file raises FileNotFoundError."""
-    try:
+    with pytest.raises(FileNotFoundError, match='(?i)not found'):
         parse_file('/nonexistent/file.md')
-        assert False, "Should have raised FileNotFoundError"
-    except FileNotFoundError as e:
-        assert 'not found' in str(e).lower()
 
 
-def test_parse_real_examples():
+@pytest.mark.skipif(not EXAMPLES_DIR.is_dir(), reason='examples directory not found')
+@pytest.mark.parametrize('name, headers', [
+    ('prompts.md', ['Category']),
+    ('restaurants.md', ['Cuisine', 'Price']),
+    ('exercises.md', ['Body Area', 'Duration']),
+])
+def test_parse_real_examples(parsed_examples, name, headers):
     """Test parsing the actual example files."""
-    # Get the examples directory
-    examples_dir = Path(__file__).parent.parent / 'examples'
-
-    if examples_dir.exists():
-        # Test prompts.md
-        prompts_file = examples_dir / 'prompts.md'
-        if prompts_file.exists():
-            parsed = parse_file(str(prompts_file))
-            assert len(parsed.entries) > 0
-            assert 'Category' in parsed.headers
-            history = parsed.metadata.get('history', [])
-            assert all(not entry.is_used(history) for entry in parsed.entries)
-
-        # Test restaurants.md
-        restaurants_file = examples_dir / 'restaurants.md'
-        if restaurants_file.exists():
-            parsed = parse_file(str(restaurants_file))
-            assert len(parsed.entries) > 0
-            assert 'Cuisine' in parsed.headers
-            assert 'Price' in parsed.headers
-
-        # Test exercises.md
-        exercises_file = examples_dir / 'exercises.md'
-        if exercises_file.exists():
-            parsed = parse_file(str(exercises_file))
-            assert len(parsed.entries) > 0
-            assert 'Body Area' in parsed.headers
-            assert 'Duration' in parsed.headers
+    if name not in parsed_examples:
+        pytest.skip(f'{name} not found in examples')
+    parsed = parsed_examples[name]
+
+    assert len(parsed.entries) > 0
+    for header in headers:
+        assert header in parsed.headers
+
+    # The examples ship with an empty history
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
 
 
 def test_backwards_compatibility_with_used_column():
@@ -314,52 +445,53 @@ history: []
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    parsed = parse_string(content)
 
-    try:
-        parsed = parse_file(temp_path)
+    # Should parse successfully
+    assert len(parsed.entries) == 3
 
-        # Should parse successfully
-        assert len(parsed.entries) == 3
+    # Headers should include Used (we keep it on parse)
+    assert 'Used' in parsed.headers
 
-        # Headers should include Used (we keep it on parse)
-        assert 'Used' in parsed.headers
+    # Metadata should only include Category (not Used)
+    assert parsed.entries[0].metadata == {'Category': 'Personal'}
+    assert parsed.entries[1].metadata == {'Category': 'Work'}
 
-        # Metadata should only include Category (not Used)
-        assert parsed.entries[0].metadata == {'Category': 'Personal'}
-        assert parsed.entries[1].metadata == {'Category': 'Work'}
+    # All entries should be unused since history is empty
+    # (the old Used column is ignored)
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
 
-        # All entries should be unused since history is empty
-        # (the old Used column is ignored)
-        history = parsed.metadata.get('history', [])
-        assert all(not entry.is_used(history) for entry in parsed.entries)
+    # When we serialize, Used column should be removed
+    serialized = MarkdownTableParser.serialize_file(parsed)
+    # "Used" may survive in the old content, but not in the header we generate
+    header_lines = HEADER_LINE_PATTERN.findall(serialized)
+    assert len(header_lines) == 1
+    assert 'Used' not in header_lines[0]
 
-        # When we serialize, Used column should be removed
-        serialized = MarkdownTableParser.serialize_file(parsed)
-        # Count occurrences of "Used" - should only appear once in old content
-        # but not in the headers or data rows we generate
-        lines = serialized.split('\n')
-        header_line = [l for l in lines if l.startswith('| Entry')]
-        assert len(header_line) == 1
-        assert 'Used' not in header_line[0]
 
-    finally:
-        Path(temp_path).unlink()
-
-
-if __name__ == '__main__':
-    # Run tests manually
-    test_parse_simple_table()
-    test_parse_table_with_multiple_metadata_columns()
-    test_parse_table_with_metadata()
-    test_serialize_file()
-    test_round_trip()
-    test_parse_empty_metadata()
-    test_parse_no_metadata()
-    test_parse_file_not_found()
-    test_parse_real_examples()
-    test_backwards_compatibility_with_used_column()
-
-    print("All parser tests passed!")
+def test_parse_table_boundaries():
+    """Test that only the first table is parsed, ignoring surrounding text."""
+    content = """# Intro
+
+Some text before the table | with a pipe.
+
+  | Entry | Category |
+|:------|:--------:|
+| First | Personal |
+
+## Still the same table
+| Second | Work |
+Closing paragraph.
+
+| Other | Table |
+|-------|-------|
+| Ignored | Row |
+"""
+
+    parsed = parse_string(content)
+
+    assert parsed.headers == ['Entry', 'Category']
+    assert [e.content for e in parsed.entries] == ['First', 'Second']
+    assert [e.row_index for e in parsed.entries] == [0, 1]
+
@@ -1,177 +1,211 @@
 """Tests for the rollback module."""
 
-import tempfile
 from pathlib import Path
 
-from quiver.parser import parse_file
+import pytest
+
+from quiver.parser import parse_file, save_file, save_metadata
 from quiver.rollback import rollback_last, reset_all
-from quiver.state import pick_and_mark, save_state
+from quiver.state import pick_and_mark, pick_mark_save, save_state
 from quiver.selector import select_random_available
 
+# Tables shared by the tests below, which add their own history
+ONE_ENTRY_TABLE = """| Entry |
+|-------|
+| First |
+"""
 
-def test_rollback_last_single():
-    """Test rolling back a single selection."""
-    content = """| Entry | Category |
+TWO_ENTRY_TABLE = """| Entry |
+|-------|
+| First |
+| Second |
+"""
+
+THREE_ENTRY_TABLE = """| Entry |
+|-------|
+| First |
+| Second |
+| Third |
+"""
+
+CATEGORY_TABLE = """| Entry | Category |
 |-------|----------|
 | First | Personal |
 | Second | Work |
 | Third | Personal |
-
-<!-- QUIVER_METADATA
-history: []
--->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
 
-    try:
-        # Parse and pick an entry
-        parsed = parse_file(temp_path)
-        entry = parsed.entries[1]  # Pick "Second"
-        pick_and_mark(parsed, entry)
-        save_state(parsed)
+def with_history(table, history):
+    """Append a QUIVER_METADATA block recording the given history."""
+    return f"{table}\n<!-- QUIVER_METADATA\nhistory: {history}\n-->\n"
+
+
+def test_rollback_last_single(write_list):
+    """Test rolling back a single selection."""
+    content = with_history(CATEGORY_TABLE, [])
 
-        # Verify it's marked as used
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert parsed.entries[1].is_used(history) is True
-        assert parsed.metadata['history'] == [1]
+    temp_path = write_list(content)
 
-        # Rollback
-        rolled_back = rollback_last(temp_path)
+    # Parse and pick an entry
+    parsed = parse_file(temp_path)
+    entry = parsed.entries[1]  # Pick "Second"
+    pick_and_mark(parsed, entry)
+    save_state(parsed)
 
-        # Verify rollback
-        assert rolled_back is not None
-        assert rolled_back.content == 'Second'
+    # Verify it's marked as used
+    history = parsed.metadata['history']
+    assert parsed.entries[1].is_used(history) is True
+    assert history == [1]
 
-        # Re-parse and verify state
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert parsed.entries[1].is_used(history) is False
-        assert parsed.metadata['history'] == []
+    # Rollback, which reads back the saved pick from the file
+    rolled_back, rolled_parsed = rollback_last(temp_path)
 
-    finally:
-        Path(temp_path).unlink()
+    # Verify rollback
+    assert rolled_back is not None
+    assert rolled_back.content == 'Second'
+    rolled_history = rolled_parsed.metadata['history']
+    assert rolled_parsed.entries[1].is_used(rolled_history) is False
+    assert rolled_history == []
 
+    # Re-parse and verify state
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert parsed.entries[1].is_used(history) is False
+    assert history == []
 
-def test_rollback_last_multiple():
+
+@pytest.mark.slow
+def test_rollback_last_multiple(write_list):
     """Test rolling back multiple selections in LIFO order."""
-    content = """| Entry |
-|-------|
-| First |
-| Second |
-| Third |
+    content = with_history(THREE_ENTRY_TABLE, [])
 
-<!-- QUIVER_METADATA
-history: []
--->
-"""
+    temp_path = write_list(content)
+
+    # Pick three entries in sequence, saving once
+    parsed = parse_file(temp_path)
+    pick_mark_save(parsed, parsed.entries)
+
+    history = parsed.metadata['history']
+    assert all(entry.is_used(history) for entry in parsed.entries)
+    assert history == [0, 1, 2]
+
+    # Rollback in LIFO order (Third, Second, First). Each call re-reads the
+    # file, so checking the state it returns also covers what was saved
+    rolled_back, parsed = rollback_last(temp_path)
+    assert rolled_back.content == 'Third'
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        # Pick three entries in sequence
-        for i in range(3):
-            parsed = parse_file(temp_path)
-            entry = parsed.entries[i]
-            pick_and_mark(parsed, entry)
-            save_state(parsed)
-
-        # Verify all three are in history
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(entry.is_used(history) for entry in parsed.entries)
-        assert parsed.metadata['history'] == [0, 1, 2]
-
-        # Rollback in LIFO order (Third, Second, First)
-        rolled_back = rollback_last(temp_path)
-        assert rolled_back.content == 'Third'
-
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert not parsed.entries[2].is_used(history)
-        assert parsed.entries[0].is_used(history)
-        assert parsed.entries[1].is_used(history)
-        assert parsed.metadata['history'] == [0, 1]
-
-        rolled_back = rollback_last(temp_path)
-        assert rolled_back.content == 'Second'
-
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert not parsed.entries[1].is_used(history)
-        assert parsed.entries[0].is_used(history)
-        assert not parsed.entries[2].is_used(history)
-        assert parsed.metadata['history'] == [0]
-
-        rolled_back = rollback_last(temp_path)
-        assert rolled_back.content == 'First'
-
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not entry.is_used(history) for entry in parsed.entries)
-        assert parsed.metadata['history'] == []
-
-    finally:
-        Path(temp_path).unlink()
-
-
-def test_rollback_last_empty_history():
+    history = parsed.metadata['history']
+    assert not parsed.entries[2].is_used(history)
+    assert parsed.entries[0].is_used(history)
+    assert parsed.entries[1].is_used(history)
+    assert history == [0, 1]
+
+    rolled_back, parsed = rollback_last(temp_path)
+    assert rolled_back.content == 'Second'
+
+    history = parsed.metadata['history']
+    assert not parsed.entries[1].is_used(history)
+    assert parsed.entries[0].is_used(history)
+    assert not parsed.entries[2].is_used(history)
+    assert history == [0]
+
+    rolled_back, parsed = rollback_last(temp_path)
+    assert rolled_back.content == 'First'
+
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
+    assert history == []
+
+    # The final state is on disk too
+    assert parse_file(temp_path).metadata['history'] == []
+
+
+def test_rollback_last_empty_history(write_list):
     """Test rolling back when history is empty returns None."""
-    content = """| Entry |
-|-------|
-| First |
+    content = with_history(ONE_ENTRY_TABLE, [])
 
-<!-- QUIVER_METADATA
-history: []
--->
+    temp_path = write_list(content)
+
+    result, _ = rollback_last(temp_path)
+    assert result is None
+
+
+def test_rollback_last_invalid_index(write_list):
+    """Test rollback when history contains invalid index - gracefully cleans up."""
+    content = with_history(ONE_ENTRY_TABLE, [5])
+
+    temp_path = write_list(content)
+
+    # Invalid index is cleaned up, so rollback returns None (no history)
+    result, _ = rollback_last(temp_path)
+    assert result is None, "Should return None when history is empty after cleanup"
+
+    # Verify the file was updated with clean history
+    parsed = parse_file(temp_path)
+    assert parsed.metadata['history'] == []
+
+
+def test_rollback_last_rewrites_only_metadata(write_list):
+    """Test that rollback leaves everything outside the metadata block untouched."""
+    table = """# Ideas
+
+| Entry  | Category |
+|:-------|---------:|
+| First  | Personal |
+| Second | Work     |
+
+Trailing notes
 """
+    content = with_history(table, [0, 1])
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
+    path = Path(temp_path)
 
-    try:
-        result = rollback_last(temp_path)
-        assert result is None
+    rolled_back, rolled_parsed = rollback_last(temp_path)
+    assert rolled_back.content == 'Second'
 
-    finally:
-        Path(temp_path).unlink()
+    assert path.read_text() == with_history(table, [0])
 
+    # The returned object can be rolled back again without re-parsing
+    rolled_parsed.metadata['history'].pop()
+    save_metadata(rolled_parsed)
+    assert parse_file(temp_path).metadata['history'] == []
+    assert path.read_text().startswith(table)
 
-def test_rollback_last_invalid_index():
-    """Test rollback when history contains invalid index - gracefully cleans up."""
-    content = """| Entry |
+
+def test_rollback_last_metadata_above_table(write_list):
+    """Test a metadata block above the table survives repeated saves."""
+    table = """# T
+
+| Entry |
 |-------|
 | First |
-
-<!-- QUIVER_METADATA
-history: [5]
--->
+| Second |
 """
+    content = "<!-- QUIVER_METADATA\nhistory: []\n-->\n\n" + table
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
 
-    try:
-        # Invalid index is cleaned up, so rollback returns None (no history)
-        result = rollback_last(temp_path)
-        assert result is None, "Should return None when history is empty after cleanup"
+    # Growing the block shifts the table, which a later full save relies on
+    parsed = parse_file(temp_path)
+    parsed.metadata['history'].extend([0, 1, 0, 1])
+    save_metadata(parsed)
+    save_file(parsed)
 
-        # Verify the file was updated with clean history
-        parsed = parse_file(temp_path)
-        assert parsed.metadata['history'] == []
+    parsed = parse_file(temp_path)
+    assert '# T' in parsed.raw_content
+    assert [e.content for e in parsed.entries] == ['First', 'Second']
+    assert parsed.metadata['history'] == [0, 1, 0, 1]
 
-    finally:
-        Path(temp_path).unlink()
+    _, rolled_parsed = rollback_last(temp_path)
+    save_file(rolled_parsed)
+    assert '# T' in Path(temp_path).read_text()
+    assert parse_file(temp_path).metadata['history'] == [0, 1, 0]
 
 
-def test_reset_all():
+@pytest.mark.slow
+def test_reset_all(write_list):
     """Test resetting all entries to unused."""
     content = """| Entry | Category |
 |-------|----------|
@@ -185,94 +219,120 @@ history: [0, 1, 3]
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        # Reset all
-        count = reset_all(temp_path)
+    temp_path = write_list(content)
 
-        # Should return count of unique entries that were used
-        assert count == 3
+    # Reset all
+    count, reset_parsed = reset_all(temp_path)
 
-        # Re-parse and verify
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
+    # Should return count of unique entries that were used
+    assert count == 3
+    assert reset_parsed.metadata['history'] == []
 
-        # All entries should be unused
-        assert all(not entry.is_used(history) for entry in parsed.entries)
+    # Re-parse and verify
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
 
-        # History should be empty
-        assert parsed.metadata['history'] == []
+    # All entries should be unused
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
 
-    finally:
-        Path(temp_path).unlink()
+    # History should be empty
+    assert history == []
 
 
-def test_reset_all_with_duplicates_in_history():
+@pytest.mark.slow
+def test_reset_all_with_duplicates_in_history(write_list):
     """Test that reset counts unique entries (handles duplicate indices)."""
-    content = """| Entry |
-|-------|
-| First |
-| Second |
+    content = with_history(TWO_ENTRY_TABLE, [0, 1, 0, 1, 0])
 
-<!-- QUIVER_METADATA
-history: [0, 1, 0, 1, 0]
--->
-"""
+    temp_path = write_list(content)
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    # Reset
+    count, _ = reset_all(temp_path)
 
-    try:
-        # Reset
-        count = reset_all(temp_path)
+    # Should count unique indices (0 and 1)
+    assert count == 2
 
-        # Should count unique indices (0 and 1)
-        assert count == 2
+    # Re-parse and verify
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
+    assert history == []
 
-        # Re-parse and verify
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not entry.is_used(history) for entry in parsed.entries)
-        assert parsed.metadata['history'] == []
 
-    finally:
-        Path(temp_path).unlink()
+@pytest.mark.slow
+def test_reset_all_already_unused(write_list):
+    """Test resetting when all entries are already unused."""
+    content = with_history(TWO_ENTRY_TABLE, [])
 
+    temp_path = write_list(content)
+    path = Path(temp_path)
 
-def test_reset_all_already_unused():
-    """Test resetting when all entries are already unused."""
-    content = """| Entry |
-|-------|
-| First |
-| Second |
+    mtime_before = path.stat().st_mtime_ns
+    count, parsed = reset_all(temp_path)
+    assert count == 0  # No entries were used
 
-<!-- QUIVER_METADATA
-history: []
--->
+    # Nothing changed, so the file isn't rewritten
+    assert path.read_text() == content
+    assert path.stat().st_mtime_ns == mtime_before
+
+    # The file is byte-for-byte the same, so the returned state matches it
+    history = parsed.metadata['history']
+    assert set(history).isdisjoint(entry.row_index for entry in parsed.entries)
+
+
+def test_reset_all_drops_unparsable_history(write_list):
+    """Test that reset rewrites a block whose history entries can't be parsed."""
+    content = TWO_ENTRY_TABLE + '\n<!-- QUIVER_METADATA\nhistory: ["a"]\n-->\n'
+
+    temp_path = write_list(content)
+
+    count, _ = reset_all(temp_path)
+    assert count == 0
+
+    assert Path(temp_path).read_text() == with_history(TWO_ENTRY_TABLE, [])
+
+
+def test_reset_all_drops_used_column(write_list):
+    """Test that reset rewrites a legacy file that still has a Used column."""
+    content = """| Entry | Used |
+|-------|------|
+| First | [x] |
+| Second | [ ] |
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    temp_path = write_list(content)
+
+    count, _ = reset_all(temp_path)
+    assert count == 0
+
+    saved = Path(temp_path).read_text()
+    assert 'Used' not in saved
+    assert '[x]' not in saved
+    parsed = parse_file(temp_path)
+    assert parsed.headers == ['Entry']
+    assert [entry.content for entry in parsed.entries] == ['First', 'Second']
+
+
+def test_rollback_and_reset_dry_run(write_list):
+    """Test that dry runs report the outcome without writing the file."""
+    content = with_history(TWO_ENTRY_TABLE, [0, 1, 1])
+
+    temp_path = write_list(content)
+    path = Path(temp_path)
 
-    try:
-        count = reset_all(temp_path)
-        assert count == 0  # No entries were used
+    entry, parsed = rollback_last(temp_path, dry_run=True)
+    assert entry.content == 'Second'
+    assert parsed.metadata['history'] == [0, 1]
 
-        # Verify file is unchanged (except maybe metadata)
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        assert all(not entry.is_used(history) for entry in parsed.entries)
+    count, parsed = reset_all(temp_path, dry_run=True)
+    assert count == 2
+    assert parsed.metadata['history'] == []
 
-    finally:
-        Path(temp_path).unlink()
+    assert path.read_text() == content
 
 
-def test_full_workflow_with_rollback():
+@pytest.mark.slow
+def test_full_workflow_with_rollback(write_list):
     """Test a complete workflow: pick -> pick -> rollback -> pick."""
     content = """# Test Workflow
 
@@ -287,68 +347,45 @@ history: []
 -->
 """
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        # Pick first entry
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        entry1 = select_random_available(parsed.entries, history)
-        assert entry1 is not None
-        pick_and_mark(parsed, entry1)
-        save_state(parsed)
-
-        # Pick second entry
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        entry2 = select_random_available(parsed.entries, history)
-        assert entry2 is not None
-        assert entry2.content != entry1.content  # Should be different
-        pick_and_mark(parsed, entry2)
-        save_state(parsed)
-
-        # Verify two are used
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        used_count = sum(1 for idx in set(history) if idx < len(parsed.entries))
-        assert used_count == 2
-
-        # Rollback last pick
-        rolled_back = rollback_last(temp_path)
-        assert rolled_back.content == entry2.content
-
-        # Verify only one is used now
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        used_count = sum(1 for idx in set(history) if idx < len(parsed.entries))
-        assert used_count == 1
-
-        # Pick another entry (should be able to pick the rolled-back one again)
-        entry3 = select_random_available(parsed.entries, history)
-        assert entry3 is not None
-        pick_and_mark(parsed, entry3)
-        save_state(parsed)
-
-        # Verify two are used again
-        parsed = parse_file(temp_path)
-        history = parsed.metadata.get('history', [])
-        used_count = sum(1 for idx in set(history) if idx < len(parsed.entries))
-        assert used_count == 2
-
-    finally:
-        Path(temp_path).unlink()
-
-
-if __name__ == '__main__':
-    test_rollback_last_single()
-    test_rollback_last_multiple()
-    test_rollback_last_empty_history()
-    test_rollback_last_invalid_index()
-    test_reset_all()
-    test_reset_all_with_duplicates_in_history()
-    test_reset_all_already_unused()
-    test_full_workflow_with_rollback()
-
-    print("All rollback tests passed!")
+    temp_path = write_list(content)
+
+    # Pick first entry. pick_and_mark updates parsed in place and save_state
+    # writes it out, so the same object stays current between steps
+    parsed = parse_file(temp_path)
+    history = parsed.metadata['history']
+    entry_range = range(len(parsed.entries))
+    entry1 = select_random_available(parsed.entries, history)
+    assert entry1 is not None
+    pick_and_mark(parsed, entry1)
+    save_state(parsed)
+
+    # Pick second entry
+    entry2 = select_random_available(parsed.entries, history)
+    assert entry2 is not None
+    assert entry2.content != entry1.content  # Should be different
+    pick_and_mark(parsed, entry2)
+    save_state(parsed)
+
+    # Verify two are used
+    used_count = len(set(history).intersection(entry_range))
+    assert used_count == 2
+
+    # Rollback last pick, continuing with the state it saved
+    rolled_back, parsed = rollback_last(temp_path)
+    assert rolled_back.content == entry2.content
+
+    # Verify only one is used now
+    history = parsed.metadata['history']
+    used_count = len(set(history).intersection(entry_range))
+    assert used_count == 1
+
+    # Pick another entry (should be able to pick the rolled-back one again)
+    entry3 = select_random_available(parsed.entries, history)
+    assert entry3 is not None
+    pick_and_mark(parsed, entry3)
+    save_state(parsed)
+
+    # Verify two are used again, both in memory and on disk
+    used_count = len(set(history).intersection(entry_range))
+    assert used_count == 2
+    assert parse_file(temp_path).metadata['history'] == history
@@ -1,14 +1,35 @@
 """Tests for the selector module."""
 
+import pytest
+
 from quiver.parser import Entry
 from quiver.selector import (
+    count_available,
     get_available_entries,
     select_random,
-    select_random_available
+    select_random_available,
+    select_random_available_many
 )
 
+# Size of the list shared by the large-list tests below
+BIG_LIST_SIZE = 10_000
+
+
+@pytest.fixture(scope='session')
+def big_entries():
+    """Build a large positional entry list once for the whole session."""
+    return [
+        Entry(content=f'Entry {i}', metadata={}, row_index=i)
+        for i in range(BIG_LIST_SIZE)
+    ]
+
 
-def test_get_available_entries():
+@pytest.mark.parametrize('history, expected', [
+    ([1, 3], ['First', 'Third']),
+    ([0, 1, 2, 3], []),
+    ([], ['First', 'Second', 'Third', 'Fourth']),
+], ids=['some_used', 'all_used', 'none_used'])
+def test_get_available_entries(history, expected):
     """Test filtering to get only unused entries."""
     entries = [
         Entry(content='First', metadata={}, row_index=0),
@@ -16,38 +37,68 @@ def test_get_available_entries():
         Entry(content='Third', metadata={}, row_index=2),
         Entry(content='Fourth', metadata={}, row_index=3),
     ]
-    history = [1, 3]  # Mark indices 1 and 3 as used
 
     available = get_available_entries(entries, history)
+    assert [e.content for e in available] == expected
+
+
+def test_get_available_entries_non_positional():
+    """Test filtering entries whose row index doesn't match their position."""
+    entries = [
+        Entry(content='Second', metadata={}, row_index=1),
+        Entry(content='Third', metadata={}, row_index=2),
+        Entry(content='Fifth', metadata={}, row_index=4),
+    ]
+
+    available = get_available_entries(entries, [2])
+    assert [e.content for e in available] == ['Second', 'Fifth']
+
+    available = get_available_entries(entries, {0, 4})
+    assert [e.content for e in available] == ['Second', 'Third']
+
+
+def test_get_available_entries_mask_and_set_paths():
+    """Test that lightly and heavily used lists filter the same way."""
+    entries = [
+        Entry(content=f'Entry {i}', metadata={}, row_index=i) for i in range(20)
+    ]
 
-    assert len(available) == 2
-    assert available[0].content == 'First'
-    assert available[1].content == 'Third'
+    # Few used indices take the byte mask path, many take the set filter
+    for history in ([3, 17], [3, 17, 3], list(range(0, 20, 2))):
+        used = set(history)
+        expected = [e for e in entries if e.row_index not in used]
+        assert get_available_entries(entries, history) == expected
 
 
-def test_get_available_entries_all_used():
-    """Test filtering when all entries are used."""
+def test_count_available():
+    """Test counting unused entries matches the available list."""
     entries = [
         Entry(content='First', metadata={}, row_index=0),
         Entry(content='Second', metadata={}, row_index=1),
+        Entry(content='Third', metadata={}, row_index=2),
     ]
-    history = [0, 1]  # All used
 
-    available = get_available_entries(entries, history)
-    assert len(available) == 0
+    assert count_available(entries, []) == 3
+    assert count_available(entries, [1, 1, 2]) == 1
+    assert count_available(entries, [0, 1, 2]) == 0
+    # Out-of-range indices don't count against the table
+    assert count_available(entries, [0, 5, -1]) == 2
 
 
-def test_get_available_entries_none_used():
-    """Test filtering when no entries are used."""
+def test_count_available_non_positional():
+    """Test counting entries whose row index doesn't match their position."""
     entries = [
-        Entry(content='First', metadata={}, row_index=0),
         Entry(content='Second', metadata={}, row_index=1),
         Entry(content='Third', metadata={}, row_index=2),
+        Entry(content='Fifth', metadata={}, row_index=4),
     ]
-    history = []  # None used
 
-    available = get_available_entries(entries, history)
-    assert len(available) == 3
+    for history in ([4], [0], [2, 2], [1, 2, 4], [5]):
+        assert count_available(entries, history) == len(
+            get_available_entries(entries, history)
+        )
+    assert count_available(entries, [4]) == 2
+    assert count_available(entries, [0]) == 3
 
 
 def test_select_random():
@@ -113,14 +164,41 @@ def test_select_random_single_available():
     assert selected.content == 'Second'
 
 
-if __name__ == '__main__':
-    test_get_available_entries()
-    test_get_available_entries_all_used()
-    test_get_available_entries_none_used()
-    test_select_random()
-    test_select_random_empty_list()
-    test_select_random_available()
-    test_select_random_available_all_used()
-    test_select_random_single_available()
+def test_select_random_available_many():
+    """Test selecting several distinct unused entries."""
+    entries = [
+        Entry(content='First', metadata={}, row_index=0),
+        Entry(content='Second', metadata={}, row_index=1),
+        Entry(content='Third', metadata={}, row_index=2),
+        Entry(content='Fourth', metadata={}, row_index=3),
+    ]
+    history = [1]
+
+    selected = select_random_available_many(entries, history, 2)
+    assert len(selected) == 2
+    assert len({e.row_index for e in selected}) == 2
+    assert set(history).isdisjoint(e.row_index for e in selected)
+
+    # Never returns more than what is available
+    selected = select_random_available_many(entries, history, 10)
+    assert sorted(e.content for e in selected) == ['First', 'Fourth', 'Third']
+
+    assert select_random_available_many(entries, [0, 1, 2, 3], 2) == []
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize('step', [1000, 7, 3, 1], ids=['0.1%', '14%', '33%', 'all'])
+def test_selector_on_big_list(big_entries, step):
+    """Test the selector fast paths against a plain filter on a large list."""
+    history = list(range(0, BIG_LIST_SIZE, step))
+    used = set(history)
+    expected = [e for e in big_entries if e.row_index not in used]
+
+    assert get_available_entries(big_entries, history) == expected
+    assert count_available(big_entries, history) == len(expected)
 
-    print("All selector tests passed!")
+    entry = select_random_available(big_entries, history)
+    if expected:
+        assert entry.row_index not in used
+    else:
+        assert entry is None
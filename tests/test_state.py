@@ -1,7 +1,6 @@
 """Tests for the state module."""
 
-import tempfile
-from pathlib import Path
+import pytest
 
 from quiver.parser import Entry, ParsedFile, parse_file
 from quiver.state import (
@@ -9,10 +8,27 @@ from quiver.state import (
     remove_from_history,
     find_entry_by_index,
     pick_and_mark,
+    pick_mark_save,
     save_state,
     validate_history
 )
 
+# List used by the file-based tests, without and with a metadata block
+LIST_TABLE = """# Test List
+
+| Entry | Category |
+|-------|----------|
+| First entry | Personal |
+| Second entry | Work |
+| Third entry | Personal |
+"""
+
+TRACKED_LIST = LIST_TABLE + """
+<!-- QUIVER_METADATA
+history: []
+-->
+"""
+
 
 def test_add_to_history():
     """Test adding entries to history."""
@@ -62,21 +78,11 @@ def test_remove_from_history():
     assert parsed_file.metadata['history'] == [0]
 
 
-def test_remove_from_history_empty():
-    """Test removing from empty history returns None."""
-    parsed_file = ParsedFile(
-        entries=[],
-        headers=[],
-        metadata={'history': []}
-    )
-
-    removed = remove_from_history(parsed_file)
-    assert removed is None
-
-
-def test_remove_from_history_no_history():
-    """Test removing when history doesn't exist returns None."""
-    parsed_file = ParsedFile(entries=[], headers=[], metadata={})
+@pytest.mark.parametrize('metadata', [{'history': []}, {}],
+                         ids=['empty_history', 'no_history'])
+def test_remove_from_history_nothing_to_remove(metadata):
+    """Test removing from an empty or missing history returns None."""
+    parsed_file = ParsedFile(entries=[], headers=[], metadata=metadata)
 
     removed = remove_from_history(parsed_file)
     assert removed is None
@@ -101,6 +107,21 @@ def test_find_entry_by_index():
     # Find non-existing entry
     not_found = find_entry_by_index(parsed_file, 99)
     assert not_found is None
+    assert find_entry_by_index(parsed_file, -1) is None
+
+
+def test_find_entry_by_index_non_positional():
+    """Test finding entries whose row index doesn't match their position."""
+    entries = [
+        Entry(content='Second', metadata={}, row_index=1),
+        Entry(content='Third', metadata={}, row_index=2),
+    ]
+
+    parsed_file = ParsedFile(entries=entries, headers=[], metadata={})
+
+    assert find_entry_by_index(parsed_file, 1).content == 'Second'
+    assert find_entry_by_index(parsed_file, 2).content == 'Third'
+    assert find_entry_by_index(parsed_file, 0) is None
 
 
 def test_pick_and_mark():
@@ -118,42 +139,55 @@ def test_pick_and_mark():
     assert 0 in parsed_file.metadata['history']
 
 
-def test_save_state():
+@pytest.mark.slow
+def test_save_state(write_list):
     """Test saving state to file."""
-    content = """| Entry | Category |
-|-------|----------|
-| First | Personal |
-| Second | Work |
+    temp_path = write_list(TRACKED_LIST)
 
-<!-- QUIVER_METADATA
-history: []
--->
-"""
+    # Parse the file
+    parsed = parse_file(temp_path)
+
+    # Modify state
+    add_to_history(parsed, parsed.entries[0])
 
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
+    # Save state
+    save_state(parsed)
 
-    try:
-        # Parse the file
-        parsed = parse_file(temp_path)
+    # Re-parse and verify changes persisted
+    parsed2 = parse_file(temp_path)
+    history = parsed2.metadata['history']
 
-        # Modify state
-        add_to_history(parsed, parsed.entries[0])
+    assert parsed2.entries[0].is_used(history) is True
+    assert parsed2.entries[1].is_used(history) is False
+    assert history == [0]
 
-        # Save state
-        save_state(parsed)
 
-        # Re-parse and verify changes persisted
-        parsed2 = parse_file(temp_path)
-        history = parsed2.metadata.get('history', [])
+def test_pick_mark_save(write_list):
+    """Test marking several entries and saving them in one step."""
+    temp_path = write_list(LIST_TABLE)
 
-        assert parsed2.entries[0].is_used(history) is True
-        assert parsed2.entries[1].is_used(history) is False
-        assert parsed2.metadata['history'] == [0]
+    parsed = parse_file(temp_path)
+    pick_mark_save(parsed, [parsed.entries[2], parsed.entries[0]])
 
-    finally:
-        Path(temp_path).unlink()
+    # History keeps selection order in memory and on disk
+    assert parsed.metadata['history'] == [2, 0]
+    assert parse_file(temp_path).metadata['history'] == [2, 0]
+
+
+def test_save_state_then_pick_mark_save(write_list):
+    """Test a full save followed by a metadata-only save keeps both changes."""
+    temp_path = write_list(TRACKED_LIST)
+
+    parsed = parse_file(temp_path)
+    parsed.entries.append(Entry(content='Fourth entry', metadata={'Category': 'Work'}, row_index=3))
+    save_state(parsed)
+
+    pick_mark_save(parsed, [parsed.entries[3]])
+
+    reparsed = parse_file(temp_path)
+    assert [e.content for e in reparsed.entries][-1] == 'Fourth entry'
+    assert reparsed.entries[3].metadata == {'Category': 'Work'}
+    assert reparsed.metadata['history'] == [3]
 
 
 def test_validate_history_valid():
@@ -192,63 +226,29 @@ def test_validate_history_out_of_bounds():
     assert parsed_file.metadata['history'] == [0, 1]
 
 
-def test_full_workflow():
+@pytest.mark.slow
+def test_full_workflow(write_list):
     """Test a complete pick -> mark -> save workflow."""
-    content = """# Test List
-
-| Entry | Category |
-|-------|----------|
-| First entry | Personal |
-| Second entry | Work |
-| Third entry | Personal |
-
-<!-- QUIVER_METADATA
-history: []
--->
-"""
-
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-        f.write(content)
-        temp_path = f.name
-
-    try:
-        # Parse the file
-        parsed = parse_file(temp_path)
-
-        # Pick an entry
-        entry_to_pick = parsed.entries[1]  # Pick "Second entry"
-
-        # Mark it as used and add to history
-        pick_and_mark(parsed, entry_to_pick)
-
-        # Save
-        save_state(parsed)
+    temp_path = write_list(TRACKED_LIST)
 
-        # Re-parse
-        parsed2 = parse_file(temp_path)
-        history = parsed2.metadata.get('history', [])
+    # Parse the file
+    parsed = parse_file(temp_path)
 
-        # Verify
-        assert parsed2.entries[0].is_used(history) is False
-        assert parsed2.entries[1].is_used(history) is True  # Marked as used
-        assert parsed2.entries[2].is_used(history) is False
-        assert parsed2.metadata['history'] == [1]
+    # Pick an entry
+    entry_to_pick = parsed.entries[1]  # Pick "Second entry"
 
-    finally:
-        Path(temp_path).unlink()
+    # Mark it as used and add to history
+    pick_and_mark(parsed, entry_to_pick)
 
+    # Save
+    save_state(parsed)
 
-if __name__ == '__main__':
-    test_add_to_history()
-    test_add_to_history_no_existing_history()
-    test_remove_from_history()
-    test_remove_from_history_empty()
-    test_remove_from_history_no_history()
-    test_find_entry_by_index()
-    test_pick_and_mark()
-    test_save_state()
-    test_validate_history_valid()
-    test_validate_history_out_of_bounds()
-    test_full_workflow()
+    # Re-parse
+    parsed2 = parse_file(temp_path)
+    history = parsed2.metadata['history']
 
-    print("All state tests passed!")
+    # Verify
+    assert parsed2.entries[0].is_used(history) is False
+    assert parsed2.entries[1].is_used(history) is True  # Marked as used
+    assert parsed2.entries[2].is_used(history) is False
+    assert history == [1]